@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+# Change-data-capture for AVLTree. Attach a stream with `tree.changes = ChangeStream()`
+# and every insert / delete / update (and bulk "reset") is published, in order,
+# with a sequence number and the before/after values:
+#
+#   ChangeEvent(seq=7, op="update", mssv=12, before={"name": .., "gpa": 6.0},
+#               after={"name": .., "gpa": 7.5}, version=31)
+#
+# Sync subscribers are called inline by the writer. Async consumers read from a
+# bounded ring buffer; when the slowest one is `capacity` events behind, the
+# writer blocks (backpressure) until it catches up or `timeout` expires.
+# AVLTree waits for room *before* it changes anything and publishes after.
+#
+# A writer must not block the thread whose event loop runs a lagging consumer:
+# that consumer could never catch up. wait_for_room() raises BufferError right
+# away in that case; a writer on an event loop should `await stream.room()`
+# before each write instead, which waits without blocking the loop.
+
+ChangeEvent = namedtuple("ChangeEvent", "seq op mssv before after version")
+
+class ChangeStream:
+    def __init__(self, capacity=1024, timeout=None):
+        self.capacity = capacity
+        self.timeout = timeout
+        self.buffer = [None] * capacity
+        self.last_seq = 0
+        self.cond = threading.Condition()
+        self.subscribers = []
+        self.consumers = set()
+
+    # ---------- WRITER SIDE ----------
+    def wait_for_room(self):
+        with self.cond:
+            self.wait_locked()
+
+    async def room(self):
+        # for writers on an event loop: wait in a helper thread so consumers on
+        # this loop keep running and can free the space
+        await asyncio.get_running_loop().run_in_executor(None, self.wait_for_room)
+
+    def wait_locked(self):
+        seq = self.last_seq + 1
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            lagging = [c for c in self.consumers if c.cursor <= seq - self.capacity]
+            if not lagging:
+                return
+            if any(c.thread == threading.get_ident() for c in lagging):
+                raise BufferError("change stream full and a lagging consumer runs on this thread: "
+                                  "waiting would deadlock (await stream.room() before writing)")
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise BufferError("change stream full: a consumer is too far behind")
+            self.cond.wait(remaining)
+
+    def publish(self, op, mssv, before, after, version):
+        with self.cond:
+            # no-op when the writer already waited for room
+            self.wait_locked()
+            seq = self.last_seq + 1
+            event = ChangeEvent(seq, op, mssv, before, after, version)
+            self.buffer[seq % self.capacity] = event
+            self.last_seq = seq
+            subscribers = list(self.subscribers)
+            consumers = list(self.consumers)
+        for callback in subscribers:
+            callback(event)
+        for consumer in consumers:
+            consumer.wake()
+        return event
+
+    # ---------- SYNC SUBSCRIBERS ----------
+    def subscribe(self, callback):
+        with self.cond:
+            self.subscribers.append(callback)
+
+        def unsubscribe():
+            with self.cond:
+                if callback in self.subscribers:
+                    self.subscribers.remove(callback)
+        return unsubscribe
+
+    # ---------- ASYNC CONSUMERS ----------
+    def events(self, start=None):
+        # start=None: only events published from now on
+        with self.cond:
+            if start is None:
+                start = self.last_seq + 1
+            if start <= self.last_seq - self.capacity:
+                raise ValueError(f"seq {start} is no longer buffered")
+            consumer = ChangeConsumer(self, max(start, 1))
+            self.consumers.add(consumer)
+            return consumer
+
+    def detach(self, consumer):
+        with self.cond:
+            self.consumers.discard(consumer)
+            self.cond.notify_all()
+
+
+class ChangeConsumer:
+    def __init__(self, stream, cursor):
+        self.stream = stream
+        self.cursor = cursor
+        self.closed = False
+        self.loop = None
+        self.thread = threading.get_ident()   # thread whose loop drains this consumer
+        self.ready = asyncio.Event()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.thread = threading.get_ident()
+        stream = self.stream
+        while True:
+            with stream.cond:
+                if self.closed:
+                    raise StopAsyncIteration
+                if self.cursor <= stream.last_seq:
+                    event = stream.buffer[self.cursor % stream.capacity]
+                    self.cursor += 1
+                    stream.cond.notify_all()
+                    return event
+                self.ready.clear()
+            await self.ready.wait()
+
+    def wake(self):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.ready.set)
+
+    def close(self):
+        self.closed = True
+        self.stream.detach(self)
+        self.wake()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
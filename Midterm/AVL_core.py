@@ -0,0 +1,570 @@
+import random
+import threading
+import unicodedata
+
+# ------------------ AVL TREE IMPLEMENTATION ------------------
+
+# outcomes reported by upsert / update_if / get_or_insert
+INSERTED = "inserted"
+UPDATED = "updated"
+FOUND = "found"
+CONFLICT = "conflict"
+MISSING = "missing"
+
+# outcomes reported by load_tree
+TRUSTED = "trusted"
+REBUILT = "rebuilt"
+
+class StudentNode:
+    def __init__(self, mssv, name, gpa):
+        self.mssv = mssv
+        self.name = name
+        self.gpa = gpa
+        self.left = None
+        self.right = None
+        self.height = 1
+        # bumped on every field update; update_if compares against it
+        self.version = 1
+
+    # the name is stored as an interned tuple of token ids, or as a plain
+    # string if it uses words outside the vocabulary (see NameDictionary)
+    @property
+    def name(self):
+        return NAMES.decode(self.name_ids)
+
+    @name.setter
+    def name(self, value):
+        self.name_ids = NAMES.encode(value)
+
+class AVLTree:
+    def __init__(self):
+        # bumped on every structural change so derived views can tell they are stale
+        self.version = 0
+        # optional AVL_cdc.ChangeStream; every write is published to it
+        self.changes = None
+
+    # Writes call wait_for_room() before touching the tree and emit() once the
+    # change is in place: a full stream (BufferError) then aborts the write
+    # cleanly, and subscribers never hear about a change that did not happen.
+    def wait_for_room(self):
+        if self.changes is not None:
+            self.changes.wait_for_room()
+
+    def emit(self, op, mssv, before=None, after=None):
+        if self.changes is not None:
+            self.changes.publish(op, mssv, before, after, self.version)
+
+    def new_node(self, mssv, name, gpa):
+        # storage hook: AVL_paged allocates a record instead
+        return StudentNode(mssv, name, gpa)
+
+    def free_node(self, node):
+        # storage hook: in-memory nodes are left to the garbage collector
+        pass
+
+    def store_root(self, root):
+        # storage hook: AVL_paged keeps the root in its file header
+        return root
+
+    def get_height(self, node):
+        return node.height if node else 0
+
+    def get_balance(self, node):
+        return self.get_height(node.left) - self.get_height(node.right) if node else 0
+
+    # ---------- ROTATIONS ----------
+    def right_rotate(self, z):
+        y = z.left
+        T3 = y.right
+
+        y.right = z
+        z.left = T3
+
+        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
+        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
+
+        return y
+
+    def left_rotate(self, z):
+        y = z.right
+        T2 = y.left
+
+        y.left = z
+        z.right = T2
+
+        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
+        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
+
+        return y
+
+    # ---------- INSERT ----------
+    def insert(self, root, mssv, name, gpa):
+        if not root:
+            self.wait_for_room()
+            node = self.new_node(mssv, name, gpa)
+            self.version += 1
+            # the stored (normalized) name, not the raw input
+            self.emit("insert", mssv, None, {"name": node.name, "gpa": node.gpa})
+            return node
+
+        if mssv < root.mssv:
+            root.left = self.insert(root.left, mssv, name, gpa)
+        elif mssv > root.mssv:
+            root.right = self.insert(root.right, mssv, name, gpa)
+        else:
+            # duplicate IDs not allowed
+            return root
+
+        root.height = 1 + max(self.get_height(root.left), self.get_height(root.right))
+        balance = self.get_balance(root)
+
+        # 4 CASES
+        if balance > 1 and mssv < root.left.mssv:
+            return self.right_rotate(root)
+        if balance < -1 and mssv > root.right.mssv:
+            return self.left_rotate(root)
+        if balance > 1 and mssv > root.left.mssv:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+        if balance < -1 and mssv < root.right.mssv:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+
+        return root
+
+    # ---------- FIND MIN ----------
+    def get_min_value_node(self, root):
+        if root is None or root.left is None:
+            return root
+        return self.get_min_value_node(root.left)
+
+    # ---------- DELETE ----------
+    def delete(self, root, key, silent=False):
+        # silent: internal removal of the moved successor, not a user-visible delete
+        if not root:
+            return root
+
+        if key < root.mssv:
+            root.left = self.delete(root.left, key, silent)
+        elif key > root.mssv:
+            root.right = self.delete(root.right, key, silent)
+        else:
+            # Node to be deleted found
+            if not silent:
+                # remove it (same node, silently), then announce it
+                before = {"name": root.name, "gpa": root.gpa}
+                self.wait_for_room()
+                root = self.delete(root, key, silent=True)
+                self.version += 1
+                self.emit("delete", key, before, None)
+                return root
+            if not root.left:
+                return root.right
+            elif not root.right:
+                return root.left
+
+            temp = self.get_min_value_node(root.right)
+            root.mssv = temp.mssv
+            root.name = temp.name
+            root.gpa = temp.gpa
+            root.version = temp.version
+            root.right = self.delete(root.right, temp.mssv, silent=True)
+
+        if not root:
+            return root
+
+        root.height = 1 + max(self.get_height(root.left), self.get_height(root.right))
+        balance = self.get_balance(root)
+
+        # Rebalance
+        if balance > 1 and self.get_balance(root.left) >= 0:
+            return self.right_rotate(root)
+        if balance > 1 and self.get_balance(root.left) < 0:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+        if balance < -1 and self.get_balance(root.right) <= 0:
+            return self.left_rotate(root)
+        if balance < -1 and self.get_balance(root.right) > 0:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+
+        return root
+
+    # ---------- SEARCH (returns node and path) ----------
+    def search_with_path(self, root, key):
+        path = []
+        node = root
+        while node:
+            path.append(node.mssv)
+            if key == node.mssv:
+                return node, path
+            elif key < node.mssv:
+                node = node.left
+            else:
+                node = node.right
+        return None, path
+
+    # ---------- SINGLE-DESCENT WRITES ----------
+    # Each returns (new_root, node, status) after one walk down the tree.
+    def rebalance(self, root):
+        root.height = 1 + max(self.get_height(root.left), self.get_height(root.right))
+        balance = self.get_balance(root)
+        if balance > 1:
+            if self.get_balance(root.left) < 0:
+                root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+        if balance < -1:
+            if self.get_balance(root.right) > 0:
+                root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+        return root
+
+    def write(self, root, mssv, on_found, on_missing):
+        if not root:
+            node, status = on_missing()
+            return node, node, status
+        if mssv < root.mssv:
+            root.left, node, status = self.write(root.left, mssv, on_found, on_missing)
+        elif mssv > root.mssv:
+            root.right, node, status = self.write(root.right, mssv, on_found, on_missing)
+        else:
+            return root, root, on_found(root)
+        if status == INSERTED:
+            return self.rebalance(root), node, status
+        return root, node, status
+
+    def encode_fields(self, fields):
+        # storage hook: every value in the form the node keeps it. Called
+        # before the node is touched, so a bad value leaves it unchanged
+        encoded = {}
+        for field, value in fields.items():
+            if field == "name":
+                encoded["name_ids"] = NAMES.encode(value)
+            elif field == "gpa":
+                encoded["gpa"] = value
+            else:
+                raise TypeError(f"unknown student field: {field}")
+        return encoded
+
+    def set_fields(self, node, fields):
+        encoded = self.encode_fields(fields)
+        self.wait_for_room()
+        before = {"name": node.name, "gpa": node.gpa}
+        for attr, value in encoded.items():
+            setattr(node, attr, value)
+        node.version += 1
+        self.version += 1
+        self.emit("update", node.mssv, before, {"name": node.name, "gpa": node.gpa})
+        return UPDATED
+
+    def create(self, mssv, name, gpa):
+        self.wait_for_room()
+        node = self.new_node(mssv, name, gpa)
+        self.version += 1
+        self.emit("insert", mssv, None, {"name": node.name, "gpa": node.gpa})
+        return node, INSERTED
+
+    def upsert(self, root, mssv, name, gpa):
+        return self.write(root, mssv,
+                          lambda node: self.set_fields(node, {"name": name, "gpa": gpa}),
+                          lambda: self.create(mssv, name, gpa))
+
+    def update_if(self, root, mssv, expected_version, **fields):
+        # expected_version=None updates unconditionally
+        def on_found(node):
+            if expected_version is not None and node.version != expected_version:
+                return CONFLICT
+            return self.set_fields(node, fields)
+        return self.write(root, mssv, on_found, lambda: (None, MISSING))
+
+    def get_or_insert(self, root, mssv, name, gpa):
+        return self.write(root, mssv, lambda node: FOUND, lambda: self.create(mssv, name, gpa))
+
+    # ---------- BULK BUILD (rows sorted by mssv, no duplicates) ----------
+    def build_from_sorted(self, rows, lo=0, hi=None):
+        if hi is None:
+            self.wait_for_room()
+            root = self.build_from_sorted(rows, lo, len(rows))
+            self.version += 1
+            # the whole tree is replaced: consumers should rebuild from it
+            self.emit("reset", None)
+            return root
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        mssv, name, gpa = rows[mid]
+        node = self.new_node(mssv, name, gpa)
+        node.left = self.build_from_sorted(rows, lo, mid)
+        node.right = self.build_from_sorted(rows, mid + 1, hi)
+        node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+        return node
+
+# ------------------ UTILITIES ------------------
+
+ho_list = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Võ", "Đặng", "Bùi", "Đỗ"]
+ten_list = ["Minh", "An", "Hải", "Hưng", "Khánh", "Long", "Nam", "Phúc", "Quân", "Tuấn",
+            "Trang", "Vy", "Linh", "Nhi", "Hương", "Thảo", "Ngọc", "My", "Yến", "Hà"]
+dem_list = ["Văn", "Thị", "Minh", "Ngọc", "Thanh", "Quốc", "Gia", "Bảo", "Thu", "Hoàng"]
+
+def random_name():
+    return random.choice(ho_list) + " " + random.choice(ten_list)
+
+def inorder_list(node, acc):
+    if not node:
+        return
+    inorder_list(node.left, acc)
+    acc.append({"mssv": node.mssv, "name": node.name, "gpa": node.gpa})
+    inorder_list(node.right, acc)
+
+def range_list(node, lo, hi, acc):
+    # inorder, but only descends into subtrees that can hold lo <= mssv <= hi
+    if not node:
+        return
+    if lo < node.mssv:
+        range_list(node.left, lo, hi, acc)
+    if lo <= node.mssv <= hi:
+        acc.append({"mssv": node.mssv, "name": node.name, "gpa": node.gpa})
+    if node.mssv < hi:
+        range_list(node.right, lo, hi, acc)
+
+# ------------------ NAME DICTIONARY ------------------
+
+def normalize_name(name):
+    # NFC, so NFD input ("Nguyễn" typed with combining marks) compares equal,
+    # and single spaces between words
+    return " ".join(unicodedata.normalize("NFC", name).split())
+
+class NameDictionary:
+    # Names are sequences of tokens from a small fixed vocabulary (ho / dem / ten).
+    # Such a name is kept as a tuple of token ids; equal names share one tuple,
+    # so per-student cost is a pointer. A name with any other word stays a
+    # (normalized) string: the token table never grows, so it cannot leak and
+    # needs no lock on lookups. The caches are bounded and shared by every
+    # thread (Streamlit sessions, the server), so they are filled under a lock.
+    def __init__(self, tokens=(), cache_size=8192):
+        self.tokens = []
+        self.ids = {}
+        self.interned = {}
+        self.encoded = {}
+        self.decoded = {}
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        for token in tokens:
+            token = normalize_name(token)
+            if token not in self.ids:
+                self.ids[token] = len(self.tokens)
+                self.tokens.append(token)
+
+    def token_id(self, token):
+        # None for a word outside the vocabulary
+        return self.ids.get(normalize_name(token))
+
+    def remember(self, cache, key, value):
+        with self.lock:
+            if len(cache) >= self.cache_size:
+                # losing the cache only costs sharing/re-decoding, never correctness
+                cache.clear()
+            return cache.setdefault(key, value)
+
+    def intern(self, ids):
+        shared = self.interned.get(ids)
+        return shared if shared is not None else self.remember(self.interned, ids, ids)
+
+    def encode(self, name):
+        if isinstance(name, tuple):
+            return self.intern(name)
+        ids = self.encoded.get(name)
+        if ids is None:
+            name = normalize_name(name)
+            ids = tuple(self.ids.get(token) for token in name.split())
+            if None in ids:
+                # not cached: one-off names would only fill the cache
+                return name
+            ids = self.remember(self.encoded, name, self.intern(ids))
+        return ids
+
+    def decode(self, ids):
+        if isinstance(ids, str):
+            return ids
+        # decoded once per distinct name, then shared
+        name = self.decoded.get(ids)
+        if name is None:
+            name = self.remember(self.decoded, ids, " ".join(self.tokens[i] for i in ids))
+        return name
+
+    def startswith(self, ids, prefix):
+        words = unicodedata.normalize("NFC", prefix).split()
+        if not words:
+            return True
+        if len(ids) < len(words):
+            return False
+        # whole tokens compare as ints; only a trailing partial token needs text
+        partial = not prefix[-1].isspace()
+        full = words[:-1] if partial else words
+        for i, word in enumerate(full):
+            if self.ids.get(word) != ids[i]:
+                return False
+        return not partial or self.tokens[ids[len(full)]].startswith(words[-1])
+
+    def contains(self, ids, text):
+        text = normalize_name(text)
+        token_id = self.ids.get(text)
+        if token_id is not None and token_id in ids:
+            return True
+        return text in self.decode(ids)
+
+NAMES = NameDictionary(ho_list + dem_list + ten_list)
+
+# ------------------ SAVE / LOAD TREE ------------------
+
+def tree_to_dict(node, encoded=False):
+    # encoded: names as token-id lists (use tree_to_snapshot to include the tokens)
+    if not node:
+        return None
+    return {
+        "mssv": node.mssv,
+        "name": encode_for_snapshot(node.name) if encoded else node.name,
+        "gpa": node.gpa,
+        "left": tree_to_dict(node.left, encoded),
+        "right": tree_to_dict(node.right, encoded)
+    }
+
+def encode_for_snapshot(name):
+    ids = NAMES.encode(name)
+    return ids if isinstance(ids, str) else list(ids)
+
+def tree_to_snapshot(root):
+    # the token table is written once; every node refers to it by id
+    return {"tokens": list(NAMES.tokens), "tree": tree_to_dict(root, encoded=True)}
+
+def rows_to_snapshot(rows):
+    # the snapshot of build_from_sorted(rows), without building the nodes
+    return {"tokens": list(NAMES.tokens), "tree": rows_to_dict(rows, 0, len(rows))}
+
+def rows_to_dict(rows, lo, hi):
+    # same split as build_from_sorted, so load_tree trusts the result
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    mssv, name, gpa = rows[mid]
+    return {
+        "mssv": mssv,
+        "name": encode_for_snapshot(name),
+        "gpa": gpa,
+        "left": rows_to_dict(rows, lo, mid),
+        "right": rows_to_dict(rows, mid + 1, hi)
+    }
+
+def node_fields(d, remap, file_tokens):
+    # (mssv, name, gpa) of one snapshot node; ValueError if it is malformed
+    mssv, name, gpa = d.get("mssv"), d.get("name"), d.get("gpa")
+    if not isinstance(mssv, int) or isinstance(mssv, bool):
+        raise ValueError(f"mssv must be an integer, not {mssv!r}")
+    if not isinstance(gpa, (int, float)) or isinstance(gpa, bool):
+        raise ValueError(f"gpa of {mssv} must be a number, not {gpa!r}")
+    if remap is not None and isinstance(name, list):
+        if not all(isinstance(i, int) and 0 <= i < len(remap) for i in name):
+            raise ValueError(f"name of {mssv} refers to a token the snapshot does not have")
+        ids = tuple(remap[i] for i in name)
+        name = " ".join(file_tokens[i] for i in name) if None in ids else NAMES.intern(ids)
+    elif not isinstance(name, str):
+        raise ValueError(f"name of {mssv} must be a string, not {name!r}")
+    return mssv, name, gpa
+
+def free_subtree(tree, node):
+    stack = [node] if node else []
+    while stack:
+        node = stack.pop()
+        stack.extend(child for child in (node.left, node.right) if child)
+        tree.free_node(node)
+
+def dict_to_tree(data, tree=None):
+    return load_tree(data, tree)[0]
+
+def load_tree(data, tree=None):
+    # One iterative post-order pass: build nodes, recompute heights and check
+    # BST order and the AVL bound. A valid snapshot is used as-is in O(n);
+    # otherwise the nodes are rebuilt into a balanced tree (O(n), or
+    # O(n log n) if the keys are out of order). Returns (root, TRUSTED|REBUILT).
+    # Malformed data raises ValueError and leaves the tree unchanged.
+    # not `tree or ...`: an empty PagedAVLTree has len() 0 and is falsy
+    if tree is None:
+        tree = AVLTree()
+    if data is not None and not isinstance(data, dict):
+        raise ValueError("tree data must be an object")
+    tree.wait_for_room()
+    remap = file_tokens = None
+    if data is not None and "tokens" in data:
+        # snapshot: map the file's token ids onto this process's dictionary
+        # (None for words it does not know; those names load as strings)
+        file_tokens = data["tokens"]
+        if not isinstance(file_tokens, list) or not all(isinstance(token, str) for token in file_tokens):
+            raise ValueError("snapshot tokens must be a list of strings")
+        if "tree" not in data:
+            raise ValueError("snapshot has no tree")
+        remap = [NAMES.token_id(token) for token in file_tokens]
+        data = data["tree"]
+    valid = True
+    stack = [(data, False)]
+    done = []   # (node, height, min mssv, max mssv) per finished subtree
+    try:
+        while stack:
+            d, children_done = stack.pop()
+            if d is None:
+                done.append(None)
+            elif not isinstance(d, dict):
+                raise ValueError(f"tree node must be an object, not {type(d).__name__}")
+            elif not children_done:
+                stack.append((d, True))
+                stack.append((d.get("right"), False))
+                stack.append((d.get("left"), False))
+            else:
+                # before the children leave `done`, so a failure still frees them
+                mssv, name, gpa = node_fields(d, remap, file_tokens)
+                node = tree.new_node(mssv, name, gpa)
+                right = done.pop()
+                left = done.pop()
+                lo = hi = node.mssv
+                hl = hr = 0
+                if left:
+                    node.left, hl, lo, left_hi = left
+                    valid = valid and left_hi < node.mssv
+                if right:
+                    node.right, hr, right_lo, hi = right
+                    valid = valid and right_lo > node.mssv
+                valid = valid and abs(hl - hr) <= 1
+                node.height = 1 + max(hl, hr)
+                done.append((node, node.height, lo, hi))
+    except ValueError:
+        # every node built so far hangs off a finished subtree
+        for subtree in done:
+            free_subtree(tree, subtree[0] if subtree else None)
+        raise
+    root = done[0][0] if done[0] else None
+
+    if valid:
+        tree.store_root(root)
+        tree.version += 1
+        tree.emit("reset", None)
+        return root, TRUSTED
+
+    rows, nodes = [], []
+    stack, node = [], root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        rows.append((node.mssv, node.name, node.gpa))
+        nodes.append(node)
+        node = node.right
+    # the first-pass nodes are replaced by the rebuild (matters for paged storage)
+    for node in nodes:
+        tree.free_node(node)
+    if any(rows[i][0] >= rows[i + 1][0] for i in range(len(rows) - 1)):
+        # keys out of order or duplicated: first occurrence wins, like insert()
+        unique = {}
+        for row in rows:
+            unique.setdefault(row[0], row)
+        rows = sorted(unique.values(), key=lambda r: r[0])
+    return tree.build_from_sorted(rows), REBUILT
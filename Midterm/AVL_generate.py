@@ -0,0 +1,164 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from AVL_core import dem_list, ho_list, rows_to_snapshot, ten_list
+
+# Seeded, vectorized synthetic students for load testing. Everything is drawn
+# as NumPy arrays one chunk at a time, so 10^7 rows never sit in memory as
+# Python objects unless the caller asks for them (to_rows / build_tree).
+# The "random" pattern is the exception for ids: to shuffle them across
+# chunks, the whole MSSV column (8 bytes per row) is drawn up front.
+
+PATTERNS = ("sequential", "gapped", "random")
+GPA_DISTS = ("uniform", "normal", "beta")
+
+# every possible full name, built once: ho [+ dem] + ten
+NAME_VOCAB = np.array(
+    [f"{ho} {ten}" for ho in ho_list for ten in ten_list] +
+    [f"{ho} {dem} {ten}" for ho in ho_list for dem in dem_list for ten in ten_list],
+    dtype=object)
+
+# ------------------ COLUMN GENERATORS ------------------
+
+def draw_names(rng, n, middle_prob=0.7):
+    ho = rng.integers(0, len(ho_list), n)
+    ten = rng.integers(0, len(ten_list), n)
+    dem = rng.integers(0, len(dem_list), n)
+    has_dem = rng.random(n) < middle_prob
+    no_dem_idx = ho * len(ten_list) + ten
+    dem_idx = len(ho_list) * len(ten_list) + (ho * len(dem_list) + dem) * len(ten_list) + ten
+    return NAME_VOCAB[np.where(has_dem, dem_idx, no_dem_idx)]
+
+def draw_gpas(rng, n, dist="uniform", mean=6.5, std=1.5, a=5.0, b=2.5):
+    if dist == "uniform":
+        gpa = rng.uniform(0, 10, n)
+    elif dist == "normal":
+        gpa = np.clip(rng.normal(mean, std, n), 0, 10)
+    elif dist == "beta":
+        gpa = rng.beta(a, b, n) * 10
+    else:
+        raise ValueError(f"Unknown GPA distribution: {dist}")
+    return np.round(gpa, 1)
+
+def draw_mssv(rng, n, start, pattern="sequential", max_gap=10):
+    # returns sorted unique ids >= start (callers shuffle for "random")
+    if pattern == "sequential":
+        return np.arange(start, start + n, dtype=np.int64)
+    if pattern in ("gapped", "random"):
+        gaps = rng.integers(1, max_gap + 1, n, dtype=np.int64)
+        return start - 1 + np.cumsum(gaps)
+    raise ValueError(f"Unknown MSSV pattern: {pattern}")
+
+# ------------------ STREAMING ------------------
+
+def generate_chunks(n, seed=0, start=1, pattern="sequential", gpa_dist="uniform",
+                    middle_prob=0.7, max_gap=10, chunk_size=1_000_000, **gpa_params):
+    rng = np.random.default_rng(seed)
+    if pattern == "random":
+        all_mssv = rng.permutation(draw_mssv(rng, n, start, pattern, max_gap))
+    done = 0
+    while done < n:
+        k = min(chunk_size, n - done)
+        if pattern == "random":
+            mssv = all_mssv[done:done + k]
+        else:
+            mssv = draw_mssv(rng, k, start, pattern, max_gap)
+            start = int(mssv[-1]) + 1
+        yield {
+            "mssv": mssv,
+            "name": draw_names(rng, k, middle_prob),
+            "gpa": draw_gpas(rng, k, gpa_dist, **gpa_params),
+        }
+        done += k
+
+def to_rows(chunk):
+    return list(zip(chunk["mssv"].tolist(), chunk["name"].tolist(), chunk["gpa"].tolist()))
+
+def sorted_rows(n, **kwargs):
+    rows = []
+    for chunk in generate_chunks(n, **kwargs):
+        rows.extend(to_rows(chunk))
+    # "random" yields ids in shuffled order
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+# ------------------ SINKS ------------------
+
+def build_tree(tree, root, n, **kwargs):
+    # O(n) balanced rebuild of existing + generated students. Generated ids
+    # start at kwargs["start"], which must be above every existing MSSV.
+    rows = []
+    stack, node = [], root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        rows.append((node.mssv, node.name, node.gpa))
+        node = node.right
+    start = kwargs.get("start", 1)
+    if rows and start <= rows[-1][0]:
+        raise ValueError(f"start={start} must be above the largest existing MSSV ({rows[-1][0]})")
+    return tree.build_from_sorted(rows + sorted_rows(n, **kwargs))
+
+def expected_last_mssv(n, start=1, pattern="sequential", max_gap=10, **kwargs):
+    # gapped ids advance (max_gap + 1) / 2 per row on average
+    step = 1 if pattern == "sequential" else (max_gap + 1) / 2
+    return int(start + step * n)
+
+def load_sharded(store, n, **kwargs):
+    if len(store) == 0:
+        # chunks arrive one at a time: cut the shard ranges from the whole id
+        # span up front, not from whichever chunk happens to come first
+        store.set_key_space(kwargs.get("start", 1), expected_last_mssv(n, **kwargs))
+    for chunk in generate_chunks(n, **kwargs):
+        store.bulk_load(to_rows(chunk), resplit=False)
+    return len(store)
+
+def write_csv(path, n, **kwargs):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(generate_chunks(n, **kwargs)):
+            pd.DataFrame(chunk).to_csv(f, index=False, header=(i == 0))
+
+def write_snapshot(path, n, **kwargs):
+    # same format as the app's "Lưu cây" (tree_to_snapshot / load_tree), built
+    # straight from the sorted rows. json.dumps in one go: json.dump writes
+    # chunk by chunk through the pure-Python encoder and is several times slower
+    snapshot = rows_to_snapshot(sorted_rows(n, **kwargs))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(snapshot, ensure_ascii=False))
+
+# ------------------ CLI ------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic student generator")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=1, help="first MSSV")
+    parser.add_argument("--pattern", choices=PATTERNS, default="sequential")
+    parser.add_argument("--max-gap", type=int, default=10)
+    parser.add_argument("--gpa", choices=GPA_DISTS, default="uniform")
+    parser.add_argument("--middle-prob", type=float, default=0.7)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--out", help="file to write; omit to only time generation")
+    parser.add_argument("--format", choices=("csv", "snapshot"), default="csv",
+                        help="snapshot: tree JSON the app can open (tree_data.json)")
+    args = parser.parse_args()
+
+    kwargs = dict(seed=args.seed, start=args.start, pattern=args.pattern, gpa_dist=args.gpa,
+                  middle_prob=args.middle_prob, max_gap=args.max_gap, chunk_size=args.chunk_size)
+    t = time.perf_counter()
+    if args.out:
+        write = write_snapshot if args.format == "snapshot" else write_csv
+        write(args.out, args.rows, **kwargs)
+        print(f"wrote {args.rows:,} rows to {args.out} in {time.perf_counter() - t:.2f}s")
+    else:
+        count = sum(len(chunk["mssv"]) for chunk in generate_chunks(args.rows, **kwargs))
+        print(f"generated {count:,} rows in {time.perf_counter() - t:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import gc
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+from AVL_core import AVLTree
+from AVL_generate import build_tree
+from AVL_server import percentile
+
+# Headless UI load test: N simulated operator sessions (one AppTest each,
+# i.e. one session_state each) against preloaded trees, driven through a
+# scripted flow. Every step is one Streamlit rerun; we time the rerun it
+# triggers. All tabs execute on every rerun, so "search" latency also
+# includes the table and queuing the tree drawings (the drawing itself runs
+# in AVL_render's background pool) - which is the point.
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AVL_tree_rev_2.py")
+FLOWS = ("add", "delete", "update", "search", "view")
+
+# ------------------ ONE SESSION ------------------
+
+class Session:
+    def __init__(self, app, size, seed, timeout):
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(app, default_timeout=timeout)
+        tree = AVLTree()
+        root = build_tree(tree, None, size, seed=seed) if size else None
+        self.at.session_state["tree_obj"] = tree
+        self.at.session_state["root"] = root
+        self.at.session_state["next_id"] = size + 1
+        self.max_id = size
+
+    def button(self, label):
+        # exact match: "Tìm" must not pick up "Tìm để cập nhật"
+        for b in self.at.button:
+            if b.label == label:
+                return b
+        raise LookupError(f"button {label!r} not found")
+
+    def number_input(self, label=None, key=None):
+        for w in self.at.number_input:
+            if (key is not None and w.key == key) or (label is not None and w.label.startswith(label)):
+                return w
+        raise LookupError(f"number_input {label or key!r} not found")
+
+    def random_id(self):
+        return self.rng.randint(1, max(1, self.max_id))
+
+    def step(self, flow):
+        # returns the seconds spent in the rerun(s) the flow triggers
+        at = self.at
+        t = time.perf_counter()
+        if flow == "add":
+            self.button("📌 Thêm ngẫu nhiên").click().run()
+            self.max_id += 1
+        elif flow == "delete":
+            self.number_input(label="Nhập MSSV cần xóa").set_value(self.random_id())
+            self.button("Xóa").click().run()
+        elif flow == "update":
+            self.number_input(key="up_id").set_value(self.random_id())
+            self.button("Tìm để cập nhật").click().run()
+            if "_edit_node" in at.session_state:
+                at.text_input(key="edit_name").set_value(f"Sinh Viên {self.rng.randint(1, 999)}")
+                self.button("Cập nhật").click().run()
+        elif flow == "search":
+            self.number_input(key="search_id").set_value(self.random_id())
+            self.button("Tìm").click().run()
+        elif flow == "view":
+            at.run()
+        else:
+            raise ValueError(f"unknown flow step: {flow}")
+        elapsed = time.perf_counter() - t
+        if at.exception:
+            raise RuntimeError(f"app raised during {flow}: {at.exception[0].value}")
+        return elapsed
+
+# ------------------ HARNESS ------------------
+
+def run(app=APP, sessions=4, size=10_000, iterations=10, flow=FLOWS, concurrent=False, timeout=60, seed=0):
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+
+    # build every session up front and time its first load
+    users = []
+    for k in range(sessions):
+        s = Session(app, size, seed + k, timeout)
+        t = time.perf_counter()
+        s.at.run()
+        latencies["first load"].append(time.perf_counter() - t)
+        users.append(s)
+
+    # what a session costs to hold, measured on identical throwaway sessions:
+    # tracemalloc slows everything down, so it must not overlap any timing
+    session_mb = []
+    tracemalloc.start()
+    for k in range(sessions):
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        s = Session(app, size, seed + k, timeout)
+        s.at.run()
+        gc.collect()
+        session_mb.append((tracemalloc.get_traced_memory()[0] - before) / 2 ** 20)
+        del s
+    tracemalloc.stop()
+
+    def drive(s):
+        for _ in range(iterations):
+            for step in flow:
+                elapsed = s.step(step)
+                with lock:
+                    latencies[step].append(elapsed)
+
+    t = time.perf_counter()
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            list(pool.map(drive, users))
+    else:
+        # round-robin: one step per session in turn
+        for _ in range(iterations):
+            for step in flow:
+                for s in users:
+                    latencies[step].append(s.step(step))
+    wall = time.perf_counter() - t
+    return latencies, session_mb, wall
+
+def report(latencies, session_mb, wall):
+    print(f"{'step':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, values in latencies.items():
+        values = sorted(values)
+        print(f"{step:<12}{len(values):>6}" + "".join(
+            f"{percentile(values, p) * 1000:>10.1f}" for p in (50, 95, 99, 100)))
+    print(f"memory per session: avg {sum(session_mb) / len(session_mb):.1f} MB, max {max(session_mb):.1f} MB")
+    print(f"wall time for scripted flows: {wall:.2f}s")
+
+# ------------------ CLI ------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session Streamlit rerun latency harness")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--size", type=int, default=10_000, help="students preloaded per session")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--flow", default=",".join(FLOWS), help="comma-separated steps: " + ",".join(FLOWS))
+    parser.add_argument("--concurrent", action="store_true", help="drive sessions from parallel threads")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    flow = tuple(step.strip() for step in args.flow.split(",") if step.strip())
+    for step in flow:
+        if step not in FLOWS:
+            parser.error(f"unknown flow step: {step}")
+    report(*run(args.app, args.sessions, args.size, args.iterations, flow,
+                args.concurrent, args.timeout, args.seed))
+
+if __name__ == "__main__":
+    main()
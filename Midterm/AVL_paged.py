@@ -0,0 +1,295 @@
+import os
+import struct
+from collections import OrderedDict
+
+from AVL_core import AVLTree, NAMES
+
+# Disk-resident AVL tree. Nodes are fixed-size records packed into fixed-size
+# pages of a single file; pages are read/written with pread/pwrite through a
+# bounded LRU buffer pool, so memory use is capped at `cache_pages` pages no
+# matter how big the registry is. Opening a file only reads the header page.
+#
+#   page 0           header: magic, root id, next unused id, free-list head, count
+#   page 1, 2, ...   PER_PAGE node records each
+#
+# Node ids start at 1; id 0 means "no node" (None).
+
+PAGE_SIZE = 4096
+MAGIC = b"AVLPAGE2"
+HEADER = struct.Struct("<8sqqqq")
+NAME_BYTES = 86
+RECORD = struct.Struct(f"<qdqqiiH{NAME_BYTES}s")   # mssv, gpa, left, right, height, version, name len, name
+PER_PAGE = PAGE_SIZE // RECORD.size
+
+# ------------------ BUFFER POOL ------------------
+
+class BufferPool:
+    def __init__(self, fd, capacity):
+        self.fd = fd
+        self.capacity = max(2, capacity)
+        self.pages = OrderedDict()
+        self.dirty = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_no):
+        page = self.pages.get(page_no)
+        if page is not None:
+            self.pages.move_to_end(page_no)
+            self.hits += 1
+            return page
+        self.misses += 1
+        data = os.pread(self.fd, PAGE_SIZE, page_no * PAGE_SIZE)
+        page = bytearray(data.ljust(PAGE_SIZE, b"\0"))
+        self.pages[page_no] = page
+        while len(self.pages) > self.capacity:
+            self.evict()
+        return page
+
+    def mark_dirty(self, page_no):
+        self.dirty.add(page_no)
+
+    def evict(self):
+        page_no, page = self.pages.popitem(last=False)
+        if page_no in self.dirty:
+            os.pwrite(self.fd, page, page_no * PAGE_SIZE)
+            self.dirty.discard(page_no)
+
+    def flush(self):
+        for page_no in sorted(self.dirty):
+            os.pwrite(self.fd, self.pages[page_no], page_no * PAGE_SIZE)
+        self.dirty.clear()
+        os.fsync(self.fd)
+
+# ------------------ NODE PROXY ------------------
+
+class PagedNode:
+    # Looks like a StudentNode to AVLTree code; every field access goes to the page.
+    __slots__ = ("tree", "id")
+
+    def __init__(self, tree, node_id):
+        self.tree = tree
+        self.id = node_id
+
+    def _read(self):
+        page, offset = self.tree.locate(self.id)
+        return RECORD.unpack_from(page, offset)
+
+    def _write(self, index, value):
+        page, offset = self.tree.locate(self.id, dirty=True)
+        fields = list(RECORD.unpack_from(page, offset))
+        fields[index] = value
+        RECORD.pack_into(page, offset, *fields)
+
+    @property
+    def mssv(self):
+        return self._read()[0]
+
+    @mssv.setter
+    def mssv(self, value):
+        self._write(0, value)
+
+    @property
+    def gpa(self):
+        return self._read()[1]
+
+    @gpa.setter
+    def gpa(self, value):
+        self._write(1, value)
+
+    @property
+    def left(self):
+        return self.tree.node(self._read()[2])
+
+    @left.setter
+    def left(self, node):
+        self._write(2, node.id if node else 0)
+
+    @property
+    def right(self):
+        return self.tree.node(self._read()[3])
+
+    @right.setter
+    def right(self, node):
+        self._write(3, node.id if node else 0)
+
+    @property
+    def height(self):
+        return self._read()[4]
+
+    @height.setter
+    def height(self, value):
+        self._write(4, value)
+
+    @property
+    def version(self):
+        return self._read()[5]
+
+    @version.setter
+    def version(self, value):
+        self._write(5, value)
+
+    @property
+    def name(self):
+        return self.name_data.decode("utf-8")
+
+    @name.setter
+    def name(self, value):
+        self.name_data = encode_name(value)
+
+    @property
+    def name_data(self):
+        fields = self._read()
+        return fields[7][:fields[6]]
+
+    @name_data.setter
+    def name_data(self, data):
+        page, offset = self.tree.locate(self.id, dirty=True)
+        fields = list(RECORD.unpack_from(page, offset))
+        fields[6], fields[7] = len(data), data
+        RECORD.pack_into(page, offset, *fields)
+
+def encode_name(name):
+    # stored in the same normalized form as in-memory names
+    name = NAMES.decode(NAMES.encode(name))
+    data = name.encode("utf-8")
+    if len(data) > NAME_BYTES:
+        # a record has a fixed-size name field; refuse rather than cut the name
+        raise ValueError(f"name is {len(data)} bytes in UTF-8, at most {NAME_BYTES} fit in a record")
+    return data
+
+# ------------------ PAGED AVL TREE ------------------
+
+class PagedAVLTree(AVLTree):
+    # Same API as AVLTree (insert/delete/search_with_path take and return a root);
+    # every write also stores the root it returns in the header, so
+    # `root = t.insert(root, ...)` survives a reopen (read it back with t.root).
+    def __init__(self, path, cache_pages=256):
+        super().__init__()
+        self.depth = 0   # nesting of the recursive write methods below
+        exists = os.path.exists(path) and os.path.getsize(path) >= PAGE_SIZE
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.pool = BufferPool(self.fd, cache_pages)
+        if exists:
+            magic, *_ = HEADER.unpack_from(self.pool.get(0), 0)
+            if magic != MAGIC:
+                os.close(self.fd)
+                raise ValueError(f"{path} is not a paged AVL file")
+        else:
+            self.write_header(0, 1, 0, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.fd is not None:
+            self.pool.flush()
+            os.close(self.fd)
+            self.fd = None
+
+    def flush(self):
+        self.pool.flush()
+
+    # ---------- HEADER ----------
+    def read_header(self):
+        _, root_id, next_id, free_head, count = HEADER.unpack_from(self.pool.get(0), 0)
+        return root_id, next_id, free_head, count
+
+    def write_header(self, root_id, next_id, free_head, count):
+        HEADER.pack_into(self.pool.get(0), 0, MAGIC, root_id, next_id, free_head, count)
+        self.pool.mark_dirty(0)
+
+    @property
+    def root(self):
+        return self.node(self.read_header()[0])
+
+    @root.setter
+    def root(self, node):
+        _, next_id, free_head, count = self.read_header()
+        self.write_header(node.id if node else 0, next_id, free_head, count)
+
+    def __len__(self):
+        return self.read_header()[3]
+
+    # ---------- RECORDS ----------
+    def locate(self, node_id, dirty=False):
+        page_no = 1 + (node_id - 1) // PER_PAGE
+        page = self.pool.get(page_no)
+        if dirty:
+            self.pool.mark_dirty(page_no)
+        return page, ((node_id - 1) % PER_PAGE) * RECORD.size
+
+    def node(self, node_id):
+        return PagedNode(self, node_id) if node_id else None
+
+    def new_node(self, mssv, name, gpa):
+        data = encode_name(name)   # may raise: check before allocating a record
+        root_id, next_id, free_head, count = self.read_header()
+        if free_head:
+            node_id = free_head
+            page, offset = self.locate(node_id)
+            free_head = RECORD.unpack_from(page, offset)[2]
+        else:
+            node_id = next_id
+            next_id += 1
+        self.write_header(root_id, next_id, free_head, count + 1)
+        page, offset = self.locate(node_id, dirty=True)
+        RECORD.pack_into(page, offset, mssv, gpa, 0, 0, 1, 1, len(data), data)
+        return PagedNode(self, node_id)
+
+    def free_node(self, node):
+        root_id, next_id, free_head, count = self.read_header()
+        page, offset = self.locate(node.id, dirty=True)
+        RECORD.pack_into(page, offset, 0, 0.0, free_head, 0, 0, 0, 0, b"")
+        self.write_header(root_id, next_id, node.id, count - 1)
+
+    def store_root(self, root):
+        self.root = root
+        return root
+
+    def encode_fields(self, fields):
+        encoded = super().encode_fields(fields)
+        if "name_ids" in encoded:
+            encoded["name_data"] = encode_name(encoded.pop("name_ids"))
+        if "gpa" in encoded:
+            # the record stores a double: refuse a non-number before writing anything
+            struct.pack("<d", encoded["gpa"])
+        return encoded
+
+    def top_level(self, call, *args):
+        # the write methods recurse through self: only the outermost call
+        # returns the root of the whole tree
+        self.depth += 1
+        try:
+            result = call(*args)
+        finally:
+            self.depth -= 1
+        if self.depth == 0:
+            self.store_root(result[0] if isinstance(result, tuple) else result)
+        return result
+
+    # ---------- AVLTree OVERRIDES ----------
+    def insert(self, root, mssv, name, gpa):
+        return self.top_level(super().insert, root, mssv, name, gpa)
+
+    def write(self, root, mssv, on_found, on_missing):
+        # upsert / update_if / get_or_insert
+        return self.top_level(super().write, root, mssv, on_found, on_missing)
+
+    def build_from_sorted(self, rows, lo=0, hi=None):
+        return self.top_level(super().build_from_sorted, rows, lo, hi)
+
+    def delete(self, root, key, silent=False):
+        return self.top_level(self.delete_node, root, key, silent)
+
+    def delete_node(self, root, key, silent):
+        # the node that actually leaves the tree always has at most one child;
+        # AVLTree.delete removes it with silent=True and then emits
+        if silent and root and key == root.mssv and (not root.left or not root.right):
+            child = root.left or root.right
+            self.free_node(root)
+            return child
+        return super().delete(root, key, silent)
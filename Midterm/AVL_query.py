@@ -0,0 +1,326 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from AVL_core import NAMES, normalize_name
+
+# Small filter-query engine over the student registry.
+#
+#   q = Query(tree, root, view).where("gpa >= 8 and name contains 'Linh' and mssv between 1000 and 5000").limit(20)
+#   print(q.explain())
+#   rows = q.all()
+#
+# Conditions are ANDed. The planner picks one access path:
+#   MssvRangeScan  walk only the part of the AVL tree inside the MSSV bounds
+#   GpaIndexScan   binary-search a GPA-sorted index kept by the table view
+#   ViewScan       vectorized filter over the view's columns, chunk by chunk
+#   FullScan       inorder walk of the whole tree (no current view)
+# and applies the remaining conditions as a filter. Rows are produced lazily,
+# so limit() stops the walk as soon as enough rows have matched.
+
+# ------------------ PREDICATES ------------------
+
+OPS = {
+    "==": lambda a, b: a == b,
+    "=": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    "<": lambda a, b: a < b,
+}
+
+FULL_RANGE = (-math.inf, True, math.inf, True)   # lo, lo inclusive, hi, hi inclusive
+
+class Compare:
+    def __init__(self, field, op, value):
+        if field not in ("mssv", "gpa"):
+            raise ValueError(f"cannot compare field {field!r}")
+        if op not in OPS:
+            raise ValueError(f"unknown operator {op!r}")
+        self.field, self.op, self.value = field, op, value
+
+    def test(self, mssv, name, gpa):
+        return OPS[self.op](mssv if self.field == "mssv" else gpa, self.value)
+
+    def mask(self, mssv, name, gpa):
+        # same as test() but over NumPy columns
+        return self.test(mssv, name, gpa)
+
+    def bounds(self):
+        v = self.value
+        return {
+            "==": (v, True, v, True), "=": (v, True, v, True),
+            ">=": (v, True, math.inf, True), ">": (v, False, math.inf, True),
+            "<=": (-math.inf, True, v, True), "<": (-math.inf, True, v, False),
+        }.get(self.op, FULL_RANGE)
+
+    def __repr__(self):
+        return f"{self.field} {self.op} {self.value}"
+
+class Between(Compare):
+    def __init__(self, field, lo, hi):
+        super().__init__(field, ">=", lo)
+        self.lo, self.hi = lo, hi
+
+    def test(self, mssv, name, gpa):
+        value = mssv if self.field == "mssv" else gpa
+        return (self.lo <= value) & (value <= self.hi)
+
+    def bounds(self):
+        return (self.lo, True, self.hi, True)
+
+    def __repr__(self):
+        return f"{self.field} between {self.lo} and {self.hi}"
+
+class NameContains:
+    field = "name"
+
+    def __init__(self, text):
+        # stored names are normalized (NFC, single spaces), so the text is too;
+        # both branches of test() then agree whichever plan runs
+        self.text = normalize_name(text)
+
+    def test(self, mssv, name, gpa):
+        # name is an id tuple for in-memory nodes (integer match), else a str
+        if isinstance(name, tuple):
+            return NAMES.contains(name, self.text)
+        return self.text in name
+
+    def mask(self, mssv, name, gpa):
+        # names repeat a lot: test each distinct name once, then broadcast
+        codes, uniques = pd.factorize(name)
+        ok = np.fromiter((self.test(None, u, None) for u in uniques), dtype=bool, count=len(uniques))
+        return ok[codes]
+
+    def __repr__(self):
+        return f"name contains {self.text!r}"
+
+class NameStartsWith(NameContains):
+    def test(self, mssv, name, gpa):
+        if isinstance(name, tuple):
+            return NAMES.startswith(name, self.text)
+        return name.startswith(self.text)
+
+    def __repr__(self):
+        return f"name startswith {self.text!r}"
+
+def covered_by_range(p, field):
+    # True if scanning the (inclusive) bounds of `field` already guarantees p
+    return p.field == field and p.op in ("==", "=", ">=", "<=")
+
+def intersect(predicates, field):
+    lo, lo_inc, hi, hi_inc = FULL_RANGE
+    for p in predicates:
+        if p.field != field:
+            continue
+        plo, plo_inc, phi, phi_inc = p.bounds()
+        if plo > lo or (plo == lo and not plo_inc):
+            lo, lo_inc = plo, plo_inc
+        if phi < hi or (phi == hi and not phi_inc):
+            hi, hi_inc = phi, phi_inc
+    return lo, lo_inc, hi, hi_inc
+
+# ------------------ EXPRESSION PARSER ------------------
+
+TOKEN = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|'([^']*)'|\"([^\"]*)\"|(>=|<=|!=|==|=|>|<)|([A-Za-z_]+))")
+
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"cannot parse query near: {text[pos:]!r}")
+        number, s1, s2, op, word = m.groups()
+        if number is not None:
+            tokens.append(("num", float(number) if "." in number else int(number)))
+        elif s1 is not None or s2 is not None:
+            tokens.append(("str", s1 if s1 is not None else s2))
+        elif op is not None:
+            tokens.append(("op", op))
+        else:
+            tokens.append(("word", word.lower()))
+        pos = m.end()
+    return tokens
+
+def parse(text):
+    # cond ("and" cond)*
+    #   cond := mssv|gpa OP number | mssv|gpa between number and number
+    #         | name contains|startswith 'text'
+    tokens = tokenize(text)
+    pos = 0
+
+    def take(kind, value=None):
+        nonlocal pos
+        if pos >= len(tokens) or tokens[pos][0] != kind or (value is not None and tokens[pos][1] != value):
+            found = tokens[pos][1] if pos < len(tokens) else "end of query"
+            raise ValueError(f"expected {value or kind}, found {found!r}")
+        pos += 1
+        return tokens[pos - 1][1]
+
+    predicates = []
+    while True:
+        field = take("word")
+        if field == "name":
+            verb = take("word")
+            if verb not in ("contains", "startswith"):
+                raise ValueError(f"expected contains/startswith after name, found {verb!r}")
+            text_value = take("str")
+            predicates.append(NameContains(text_value) if verb == "contains" else NameStartsWith(text_value))
+        elif field in ("mssv", "gpa"):
+            if pos < len(tokens) and tokens[pos] == ("word", "between"):
+                pos += 1
+                lo = take("num")
+                take("word", "and")
+                hi = take("num")
+                predicates.append(Between(field, lo, hi))
+            else:
+                predicates.append(Compare(field, take("op"), take("num")))
+        else:
+            raise ValueError(f"unknown field {field!r}")
+        if pos == len(tokens):
+            return predicates
+        take("word", "and")
+
+# ------------------ ACCESS PATHS ------------------
+
+def tree_scan(root, lo=-math.inf, hi=math.inf):
+    # lazy inorder walk restricted to lo <= mssv <= hi
+    stack, node = [], root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left if node.mssv > lo else None
+        node = stack.pop()
+        if node.mssv > hi:
+            return
+        if node.mssv >= lo:
+            yield node.mssv, getattr(node, "name_ids", None) or node.name, node.gpa, node
+        node = node.right
+
+def slice_bounds(sorted_values, lo, lo_inc, hi, hi_inc):
+    start = np.searchsorted(sorted_values, lo, side="left" if lo_inc else "right")
+    stop = np.searchsorted(sorted_values, hi, side="right" if hi_inc else "left")
+    return int(start), int(max(start, stop))
+
+class Plan:
+    def __init__(self, access, detail, estimate, rows, residual):
+        self.access = access
+        self.detail = detail
+        self.estimate = estimate
+        self.rows = rows          # callable -> iterator of (mssv, name, gpa, node-or-None)
+        self.residual = residual  # predicates still checked per row
+
+# ------------------ QUERY ------------------
+
+class Query:
+    def __init__(self, tree, root, view=None):
+        self.tree = tree
+        self.root = root
+        # the columnar view is only trusted if it reflects this exact tree version
+        self.view = view if view is not None and view.is_current(tree) else None
+        self.predicates = []
+        self.max_rows = None
+
+    def where(self, *conditions):
+        for c in conditions:
+            self.predicates.extend(parse(c) if isinstance(c, str) else [c])
+        return self
+
+    def limit(self, n):
+        self.max_rows = n
+        return self
+
+    # ---------- PLANNING ----------
+    def candidate_plans(self):
+        mlo, mlo_inc, mhi, mhi_inc = intersect(self.predicates, "mssv")
+        glo, glo_inc, ghi, ghi_inc = intersect(self.predicates, "gpa")
+        n = len(self.view) if self.view is not None else None
+        plans = []
+
+        if self.view is not None:
+            plans.append(Plan("ViewScan", "vectorized over view columns", n,
+                              lambda: self.view_rows(), []))
+        else:
+            plans.append(Plan("FullScan", "inorder over AVL tree", n,
+                              lambda: tree_scan(self.root), self.predicates))
+
+        if (mlo, mhi) != (-math.inf, math.inf):
+            estimate = None
+            if self.view is not None:
+                start, stop = slice_bounds(self.view.mssv[:n], mlo, mlo_inc, mhi, mhi_inc)
+                estimate = stop - start
+            residual = [p for p in self.predicates if not covered_by_range(p, "mssv")]
+            plans.append(Plan("MssvRangeScan", f"AVL tree, mssv in [{mlo}, {mhi}]", estimate,
+                              lambda lo=mlo, hi=mhi: tree_scan(self.root, lo, hi), residual))
+
+        if self.view is not None and (glo, ghi) != (-math.inf, math.inf):
+            sorted_gpa, order = self.view.gpa_index()
+            start, stop = slice_bounds(sorted_gpa, glo, glo_inc, ghi, ghi_inc)
+            # the index slice honours strict bounds exactly; only != stays
+            residual = [p for p in self.predicates if p.field != "gpa" or p.op == "!="]
+            plans.append(Plan("GpaIndexScan", f"view GPA index, gpa in [{glo}, {ghi}]", stop - start,
+                              lambda rows=order[start:stop]: self.gpa_rows(rows), residual))
+        return plans
+
+    def plan(self):
+        plans = self.candidate_plans()
+        if self.view is None:
+            # no statistics: a bounded MSSV range beats a full walk
+            return plans[-1]
+        return min(plans, key=lambda p: p.estimate)
+
+    def gpa_rows(self, positions):
+        view = self.view
+        # back to MSSV order so results match the other paths
+        for i in np.sort(positions).tolist():
+            yield int(view.mssv[i]), view.name[i], float(view.gpa[i]), None
+
+    def view_rows(self, chunk=65_536):
+        # chunked so limit() can stop early without masking the whole table
+        view = self.view
+        for lo in range(0, len(view), chunk):
+            hi = min(len(view), lo + chunk)
+            mssv, name, gpa = view.mssv[lo:hi], view.name[lo:hi], view.gpa[lo:hi]
+            keep = np.ones(hi - lo, dtype=bool)
+            for p in self.predicates:
+                keep &= p.mask(mssv, name, gpa)
+            for i in np.flatnonzero(keep).tolist():
+                yield int(mssv[i]), name[i], float(gpa[i]), None
+
+    def explain(self):
+        plan = self.plan()
+        lines = []
+        indent = ""
+        if self.max_rows is not None:
+            lines.append(f"Limit {self.max_rows}")
+            indent = "  "
+        if plan.residual:
+            lines.append(indent + "Filter " + " and ".join(map(repr, plan.residual)))
+            indent += "  "
+        estimate = "?" if plan.estimate is None else f"~{plan.estimate:,}"
+        lines.append(f"{indent}{plan.access} ({plan.detail}) rows={estimate}")
+        others = [p for p in self.candidate_plans() if p.access != plan.access]
+        for p in others:
+            lines.append(f"-- considered {p.access}: rows={'?' if p.estimate is None else f'~{p.estimate:,}'}")
+        return "\n".join(lines)
+
+    # ---------- EXECUTION ----------
+    def __iter__(self):
+        plan = self.plan()
+        residual = plan.residual
+        emitted = 0
+        if self.max_rows is not None and self.max_rows <= 0:
+            return
+        for mssv, name, gpa, node in plan.rows():
+            if all(p.test(mssv, name, gpa) for p in residual):
+                yield {"mssv": mssv, "name": NAMES.decode(name) if isinstance(name, tuple) else name, "gpa": gpa}
+                emitted += 1
+                if self.max_rows is not None and emitted >= self.max_rows:
+                    return
+
+    def all(self):
+        return list(self)
@@ -0,0 +1,265 @@
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import graphviz
+
+# Tree drawing, synchronous (visualize_tree) or in a background process pool
+# (RenderWorker). The worker gets a flat snapshot of the tree - not the nodes -
+# so the tree can keep changing while a render is in flight.
+
+# ------------------ SNAPSHOT ------------------
+
+HIDDEN = "…"   # child exists but is cut from the snapshot
+
+def visible_nodes(root, highlight_path, max_nodes):
+    # whole levels from the top while they fit in max_nodes, plus the search path
+    keep = set()
+    level = [root]
+    while level and len(keep) + len(level) <= max_nodes:
+        keep.update(id(node) for node in level)
+        level = [child for node in level for child in (node.left, node.right) if child]
+    if not keep:
+        keep.add(id(root))
+    path = set(highlight_path or ())
+    node = root
+    while node and node.mssv in path:
+        keep.add(id(node))
+        # the path is a root-to-node walk: follow whichever child is on it
+        node = node.left if node.left and node.left.mssv in path else node.right if node.right and node.right.mssv in path else None
+    return keep
+
+def tree_snapshot(root, highlight_path=None, max_nodes=None):
+    # preorder list of (mssv, depth, bf, left mssv, right mssv). With max_nodes
+    # only the top of the tree (and the path) is taken - O(max_nodes), not O(n) -
+    # and cut-off children are HIDDEN
+    keep = None if root is None or max_nodes is None else visible_nodes(root, highlight_path, max_nodes)
+    snapshot = []
+    stack = [(root, 0)] if root else []
+    while stack:
+        node, depth = stack.pop()
+        left, right = node.left, node.right
+        bf = (left.height if left else 0) - (right.height if right else 0)
+        if keep is not None:
+            left = HIDDEN if left and id(left) not in keep else left
+            right = HIDDEN if right and id(right) not in keep else right
+        snapshot.append((node.mssv, depth, bf,
+                         child_key(left), child_key(right)))
+        if right and right is not HIDDEN:
+            stack.append((right, depth + 1))
+        if left and left is not HIDDEN:
+            stack.append((left, depth + 1))
+    return snapshot
+
+def child_key(child):
+    if child is None or child is HIDDEN:
+        return child
+    return child.mssv
+
+# ------------------ VISUALIZATION ------------------
+
+def bf_color(bf):
+    # BF = 0: green; BF = ±1: yellow; |BF|>=2: red
+    if bf == 0:
+        return "lightgreen"
+    if abs(bf) == 1:
+        return "lightgoldenrodyellow"
+    return "lightcoral"
+
+def edge_on_path(highlight_path, a, b):
+    if not highlight_path or a not in highlight_path or b not in highlight_path:
+        return False
+    i = highlight_path.index(a)
+    return (i + 1 < len(highlight_path) and highlight_path[i + 1] == b) or (i > 0 and highlight_path[i - 1] == b)
+
+def snapshot_to_dot(snapshot, highlight_path=None):
+    dot = graphviz.Digraph(format="png")
+    if not snapshot:
+        return dot
+
+    # Create nodes with record label: {depth | mssv | BF}
+    for mssv, depth, bf, left, right in snapshot:
+        label = "{{ {} | {} | BF:{} }}".format(depth, mssv, bf)
+        dot.node(str(mssv), label=label, shape="record", style="filled", fillcolor=bf_color(bf))
+
+    # Create edges in the same order as a recursive walk; highlight edges along path if provided
+    children = {mssv: (left, right) for mssv, _, _, left, right in snapshot}
+    stack = [snapshot[0][0]]
+    pending_right = []
+    while stack or pending_right:
+        if stack:
+            mssv = stack.pop()
+            left, right = children[mssv]
+            if right is not None:
+                pending_right.append((mssv, right))
+            if left == HIDDEN:
+                add_hidden(dot, mssv, "L")
+            elif left is not None:
+                attrs = {"color": "red", "penwidth": "2"} if edge_on_path(highlight_path, mssv, left) else {}
+                dot.edge(str(mssv), str(left), **attrs)
+                stack.append(left)
+        else:
+            mssv, right = pending_right.pop()
+            if right == HIDDEN:
+                add_hidden(dot, mssv, "R")
+                continue
+            attrs = {"color": "red", "penwidth": "2"} if edge_on_path(highlight_path, mssv, right) else {}
+            dot.edge(str(mssv), str(right), **attrs)
+            stack.append(right)
+    return dot
+
+def add_hidden(dot, parent, side):
+    # stands in for a subtree that was left out of the snapshot
+    name = f"{parent}_{side}_hidden"
+    dot.node(name, label=HIDDEN, shape="plaintext")
+    dot.edge(str(parent), name, style="dashed")
+
+def visualize_tree(root, highlight_path=None):
+    return snapshot_to_dot(tree_snapshot(root), highlight_path)
+
+def render(snapshot, highlight_path=None):
+    # runs in a worker process: SVG if the Graphviz `dot` binary is installed,
+    # otherwise the DOT source for the browser-side renderer
+    dot = snapshot_to_dot(snapshot, highlight_path)
+    try:
+        return "svg", dot.pipe(format="svg").decode("utf-8")
+    except graphviz.ExecutableNotFound:
+        return "dot", dot.source
+
+# ------------------ BACKGROUND RENDERER ------------------
+
+class Canvas:
+    def __init__(self):
+        self.last_used = time.monotonic()
+        self.token = None        # what was asked for last (e.g. tree version + path)
+        self.ticket = 0          # increases with every new request
+        self.timer = None        # debounce timer not yet fired
+        self.future = None       # render queued or running
+        self.shown_ticket = 0
+        self.result = None       # (token, kind, data) of the newest finished render
+        self.error = None
+
+class RenderWorker:
+    # One pool shared by many canvases (e.g. every session's "view" and "search").
+    # Per canvas only the newest request is rendered: requests inside the
+    # debounce window replace each other, a queued render is cancelled when a
+    # newer one arrives, and a render that finishes after a newer one was shown
+    # is dropped. Until the new image is ready, latest() keeps returning the old one.
+    #
+    # The snapshot is taken on the caller's thread (the tree is only safe to
+    # read there) but only covers the top max_nodes of the tree plus the
+    # highlighted path, so its cost does not grow with the tree. A canvas not
+    # used for idle_ttl seconds (e.g. its session ended) is dropped with its image.
+    def __init__(self, max_workers=2, debounce=0.15, mp_context=None, max_nodes=511, idle_ttl=900):
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context(mp_context))
+        self.debounce = debounce
+        self.max_nodes = max_nodes
+        self.idle_ttl = idle_ttl
+        self.lock = threading.Lock()
+        self.canvases = {}
+
+    def request(self, key, token, root, highlight_path=None):
+        with self.lock:
+            self.evict_idle()
+            canvas = self.canvases.get(key)
+            if canvas is not None:
+                canvas.last_used = time.monotonic()
+                if canvas.token == token:
+                    return
+        # outside the lock: other sessions' canvases need not wait for it
+        snapshot = tree_snapshot(root, highlight_path, self.max_nodes)
+        with self.lock:
+            canvas = self.canvases.setdefault(key, Canvas())
+            if canvas.token == token:
+                return
+            canvas.token = token
+            canvas.ticket += 1
+            if canvas.timer:
+                canvas.timer.cancel()
+            if canvas.future:
+                canvas.future.cancel()
+            args = (key, canvas.ticket, token, snapshot, list(highlight_path) if highlight_path else None)
+            canvas.timer = threading.Timer(self.debounce, self.submit, args)
+            canvas.timer.daemon = True
+            canvas.timer.start()
+
+    def submit(self, key, ticket, token, snapshot, highlight_path):
+        with self.lock:
+            canvas = self.canvases.get(key)
+            if canvas is None or ticket != canvas.ticket:
+                return
+            canvas.timer = None
+            try:
+                future = canvas.future = self.pool.submit(render, snapshot, highlight_path)
+            except RuntimeError as e:
+                # pool shut down
+                canvas.error = e
+                return
+        future.add_done_callback(lambda f: self.finish(key, ticket, token, f))
+
+    def finish(self, key, ticket, token, future):
+        if future.cancelled():
+            return
+        with self.lock:
+            canvas = self.canvases.get(key)
+            if canvas is None:
+                return
+            if canvas.future is future:
+                canvas.future = None
+            if ticket < canvas.shown_ticket:
+                return
+            try:
+                kind, data = future.result()
+            except Exception as e:
+                canvas.error = e
+                return
+            canvas.shown_ticket = ticket
+            canvas.result = (token, kind, data)
+            canvas.error = None
+
+    def latest(self, key):
+        with self.lock:
+            canvas = self.canvases.get(key)
+            if canvas is None:
+                return None
+            canvas.last_used = time.monotonic()
+            return canvas.result
+
+    def error(self, key):
+        with self.lock:
+            canvas = self.canvases.get(key)
+            return canvas.error if canvas else None
+
+    def is_pending(self, key):
+        with self.lock:
+            canvas = self.canvases.get(key)
+            if canvas is None:
+                return False
+            return canvas.timer is not None or (canvas.future is not None and not canvas.future.done())
+
+    def forget(self, key):
+        with self.lock:
+            self.drop(key)
+
+    def evict_idle(self):
+        # caller holds the lock
+        cutoff = time.monotonic() - self.idle_ttl
+        for key in [k for k, c in self.canvases.items() if c.last_used < cutoff]:
+            self.drop(key)
+
+    def drop(self, key):
+        canvas = self.canvases.pop(key, None)
+        if canvas is None:
+            return
+        if canvas.timer:
+            canvas.timer.cancel()
+        if canvas.future:
+            canvas.future.cancel()
+
+    def close(self):
+        with self.lock:
+            for canvas in self.canvases.values():
+                if canvas.timer:
+                    canvas.timer.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from AVL_core import AVLTree, INSERTED, random_name, range_list
+
+# Protocol: newline-delimited JSON over TCP.
+#   request:  {"id": 1, "op": "insert", "mssv": 5, "name": "Lê An", "gpa": 8.5}
+#   response: {"id": 1, "ok": true, "result": ...}  or  {"id": 1, "ok": false, "error": "..."}
+# "update" takes an optional "version" (from "search") and only applies if it still matches;
+# like "upsert" it returns the status: "updated", "conflict" or "missing".
+# Responses on one connection come back in request order.
+
+OPS = ("insert", "upsert", "delete", "update", "search", "range", "size")
+WRITES = ("insert", "upsert", "delete", "update")
+STOPPED = {"ok": False, "error": "registry stopped"}
+
+# ------------------ REGISTRY (AVL store + micro-batching) ------------------
+
+class StudentRegistry:
+    def __init__(self, max_batch=512, max_delay=0.001):
+        self.tree = AVLTree()
+        self.root = None
+        self.size = 0
+        self.lock = asyncio.Lock()
+        self.queue = asyncio.Queue()
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.batcher = None
+
+    def start(self):
+        self.batcher = asyncio.create_task(self.run_batches())
+
+    async def stop(self):
+        if self.batcher:
+            self.batcher.cancel()
+            try:
+                await self.batcher
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, req):
+        fut = asyncio.get_running_loop().create_future()
+        if self.batcher is not None and self.batcher.done():
+            fut.set_result(dict(STOPPED))
+        else:
+            self.queue.put_nowait((req, fut))
+        return fut
+
+    async def run_batches(self):
+        batch = []
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                if self.max_delay:
+                    # give concurrent clients a moment to join this batch
+                    await asyncio.sleep(self.max_delay)
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                async with self.lock:
+                    for req, fut in batch:
+                        if fut.done():
+                            continue
+                        try:
+                            if self.tree.changes is not None and req.get("op") in WRITES:
+                                # backpressure without blocking this loop
+                                await self.tree.changes.room()
+                            resp = {"ok": True, "result": self.apply(req)}
+                        except Exception as e:
+                            # one bad request (e.g. "mssv": 1e999) must not stop the batcher
+                            resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                        fut.set_result(resp)
+                self.batches += 1
+        finally:
+            # stopped or crashed: answer everything still waiting instead of hanging
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_result(dict(STOPPED))
+
+    def apply(self, req):
+        op = req["op"]
+        if op in ("insert", "upsert"):
+            write = self.tree.get_or_insert if op == "insert" else self.tree.upsert
+            self.root, _, status = write(self.root, int(req["mssv"]), str(req["name"]), round(float(req["gpa"]), 1))
+            if status == INSERTED:
+                self.size += 1
+            return status == INSERTED if op == "insert" else status
+        if op == "delete":
+            mssv = int(req["mssv"])
+            node, _ = self.tree.search_with_path(self.root, mssv)
+            if not node:
+                return False
+            self.root = self.tree.delete(self.root, mssv)
+            self.size -= 1
+            return True
+        if op == "update":
+            fields = {}
+            if req.get("name"):
+                fields["name"] = str(req["name"])
+            if req.get("gpa") is not None:
+                fields["gpa"] = round(float(req["gpa"]), 1)
+            self.root, _, status = self.tree.update_if(self.root, int(req["mssv"]), req.get("version"), **fields)
+            return status
+        if op == "search":
+            node, _ = self.tree.search_with_path(self.root, int(req["mssv"]))
+            return {"mssv": node.mssv, "name": node.name, "gpa": node.gpa, "version": node.version} if node else None
+        if op == "range":
+            rows = []
+            range_list(self.root, int(req["lo"]), int(req["hi"]), rows)
+            return rows
+        if op == "size":
+            return self.size
+        raise ValueError(f"unknown op {op!r}")
+
+# ------------------ SERVER ------------------
+
+async def handle_connection(registry, reader, writer):
+    pending = asyncio.Queue()
+
+    async def write_responses():
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                req_id, fut = item
+                resp = await fut
+                resp["id"] = req_id
+                if writer.is_closing():
+                    break
+                writer.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+                if pending.empty():
+                    await writer.drain()
+        except ConnectionError:
+            # client went away: the remaining responses have nowhere to go
+            pass
+
+    responder = asyncio.create_task(write_responses())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            req = None
+            try:
+                req = json.loads(line)
+                if req.get("op") not in OPS:
+                    raise ValueError(f"unknown op {req.get('op')!r}")
+                fut = registry.submit(req)
+            except (ValueError, AttributeError) as e:
+                req = req if isinstance(req, dict) else {}
+                fut = asyncio.get_running_loop().create_future()
+                fut.set_result({"ok": False, "error": f"bad request: {e}"})
+            pending.put_nowait((req.get("id"), fut))
+    except ConnectionError:
+        pass
+    finally:
+        pending.put_nowait(None)
+        await responder
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(host="127.0.0.1", port=8765, max_batch=512, max_delay=0.001):
+    registry = StudentRegistry(max_batch, max_delay)
+    registry.start()
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(registry, r, w), host, port, limit=2 ** 24)
+    print(f"AVL registry listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await registry.stop()
+
+# ------------------ ASYNC CLIENT ------------------
+
+class AVLClient:
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+        self.waiting = {}
+        self.receiver = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=2 ** 24)
+        self.receiver = asyncio.create_task(self.receive())
+        return self
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            await self.writer.wait_closed()
+        if self.receiver:
+            await asyncio.gather(self.receiver, return_exceptions=True)
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                resp = json.loads(line)
+                fut = self.waiting.pop(resp.get("id"), None)
+                if fut and not fut.done():
+                    fut.set_result(resp)
+        finally:
+            for fut in self.waiting.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("connection closed"))
+            self.waiting.clear()
+
+    async def request(self, op, **fields):
+        self.next_id += 1
+        req_id = self.next_id
+        fut = asyncio.get_running_loop().create_future()
+        self.waiting[req_id] = fut
+        self.writer.write(json.dumps({"id": req_id, "op": op, **fields}, ensure_ascii=False).encode("utf-8") + b"\n")
+        resp = await fut
+        if not resp["ok"]:
+            raise RuntimeError(resp["error"])
+        return resp["result"]
+
+    async def insert(self, mssv, name, gpa):
+        return await self.request("insert", mssv=mssv, name=name, gpa=gpa)
+
+    async def upsert(self, mssv, name, gpa):
+        return await self.request("upsert", mssv=mssv, name=name, gpa=gpa)
+
+    async def delete(self, mssv):
+        return await self.request("delete", mssv=mssv)
+
+    async def update(self, mssv, name=None, gpa=None, version=None):
+        return await self.request("update", mssv=mssv, name=name, gpa=gpa, version=version)
+
+    async def search(self, mssv):
+        return await self.request("search", mssv=mssv)
+
+    async def range(self, lo, hi):
+        return await self.request("range", lo=lo, hi=hi)
+
+    async def size(self):
+        return await self.request("size")
+
+# ------------------ LOAD GENERATOR ------------------
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+async def load_generator(host, port, clients, requests, concurrency, preload, write_ratio, seed=0):
+    rnd = random.Random(seed)
+    async with AVLClient(host, port) as c:
+        await asyncio.gather(*(c.insert(m, random_name(), round(rnd.uniform(0, 10), 1))
+                               for m in range(1, preload + 1)))
+
+    latencies = []
+
+    async def one_client(k):
+        r = random.Random(seed + k + 1)
+        sem = asyncio.Semaphore(concurrency)
+        async with AVLClient(host, port) as c:
+            async def one_request():
+                async with sem:
+                    mssv = r.randint(1, max(1, preload))
+                    t = time.perf_counter()
+                    if r.random() < write_ratio:
+                        await c.update(mssv, gpa=round(r.uniform(0, 10), 1))
+                    else:
+                        await c.search(mssv)
+                    latencies.append(time.perf_counter() - t)
+            await asyncio.gather(*(one_request() for _ in range(requests)))
+
+    t = time.perf_counter()
+    await asyncio.gather(*(one_client(k) for k in range(clients)))
+    elapsed = time.perf_counter() - t
+
+    latencies.sort()
+    total = clients * requests
+    print(f"{total} requests in {elapsed:.2f}s -> {total / elapsed:,.0f} req/s")
+    print("latency ms: p50={:.2f} p95={:.2f} p99={:.2f} max={:.2f}".format(
+        *(percentile(latencies, p) * 1000 for p in (50, 95, 99, 100))))
+
+# ------------------ CLI ------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio AVL student registry")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("--max-batch", type=int, default=512)
+    p_serve.add_argument("--max-delay", type=float, default=0.001)
+
+    p_load = sub.add_parser("loadgen")
+    p_load.add_argument("--clients", type=int, default=8)
+    p_load.add_argument("--requests", type=int, default=10_000, help="requests per client")
+    p_load.add_argument("--concurrency", type=int, default=64, help="in-flight requests per client")
+    p_load.add_argument("--preload", type=int, default=10_000)
+    p_load.add_argument("--write-ratio", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.cmd == "serve":
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_delay))
+    else:
+        asyncio.run(load_generator(args.host, args.port, args.clients, args.requests,
+                                   args.concurrency, args.preload, args.write_ratio))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import argparse
+import bisect
+import heapq
+import multiprocessing as mp
+import random
+import time
+
+from AVL_core import AVLTree, INSERTED, ho_list, ten_list, range_list
+
+# Rows travel between processes as (mssv, name, gpa) tuples, sorted by mssv.
+
+# ------------------ WORKER PROCESS (one AVLTree per shard) ------------------
+
+def tree_rows(node, acc):
+    stack = []
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        acc.append((node.mssv, node.name, node.gpa))
+        node = node.right
+
+def merge_rows(old_rows, new_rows):
+    # both inputs sorted; an mssv already in the shard (or seen first in
+    # new_rows) wins, same as insert()
+    merged = []
+    for row in heapq.merge(old_rows, new_rows, key=lambda r: r[0]):
+        if merged and merged[-1][0] == row[0]:
+            continue
+        merged.append(row)
+    return merged
+
+def aggregate(node, lo, hi):
+    # (count, gpa sum, gpa min, gpa max) over lo <= mssv <= hi
+    count, total, gpa_min, gpa_max = 0, 0.0, None, None
+    stack = [node] if node else []
+    while stack:
+        node = stack.pop()
+        if lo <= node.mssv <= hi:
+            count += 1
+            total += node.gpa
+            gpa_min = node.gpa if gpa_min is None else min(gpa_min, node.gpa)
+            gpa_max = node.gpa if gpa_max is None else max(gpa_max, node.gpa)
+        if node.left and lo < node.mssv:
+            stack.append(node.left)
+        if node.right and node.mssv < hi:
+            stack.append(node.right)
+    return count, total, gpa_min, gpa_max
+
+def shard_worker(conn):
+    tree = AVLTree()
+    root = None
+    size = 0
+    while True:
+        op, args = conn.recv()
+        if op == "stop":
+            conn.send(None)
+            break
+        try:
+            if op in ("insert", "upsert"):
+                write = tree.get_or_insert if op == "insert" else tree.upsert
+                root, node, status = write(root, *args)
+                if status == INSERTED:
+                    size += 1
+                result = status
+            elif op == "delete":
+                node, _ = tree.search_with_path(root, args)
+                if node is not None:
+                    root = tree.delete(root, args)
+                    size -= 1
+                result = node is not None
+            elif op == "search":
+                node, path = tree.search_with_path(root, args)
+                result = None if node is None else {"mssv": node.mssv, "name": node.name, "gpa": node.gpa}
+            elif op == "load":
+                old_rows = []
+                tree_rows(root, old_rows)
+                # build_from_sorted needs unique keys: drop repeated mssv
+                rows = merge_rows(old_rows, args)
+                root = tree.build_from_sorted(rows)
+                size = len(rows)
+                result = size
+            elif op == "range":
+                lo, hi = args
+                result = []
+                range_list(root, lo, hi, result)
+            elif op == "aggregate":
+                lo, hi = args
+                result = aggregate(root, lo, hi)
+            elif op == "export":
+                result = []
+                tree_rows(root, result)
+            elif op == "take":
+                # hand the k lowest / highest rows to the coordinator, plus the
+                # new boundary key between what left and what stayed
+                k, end = args
+                rows = []
+                tree_rows(root, rows)
+                k = min(k, len(rows))
+                if end == "low":
+                    moved, rows = rows[:k], rows[k:]
+                    boundary = rows[0][0] if rows else None
+                else:
+                    rows, moved = rows[:len(rows) - k], rows[len(rows) - k:]
+                    boundary = moved[0][0] if moved else None
+                root = tree.build_from_sorted(rows)
+                size = len(rows)
+                result = moved, boundary
+            elif op == "clear":
+                root = None
+                size = 0
+                result = 0
+            else:
+                raise ValueError(f"Unknown shard op: {op}")
+            conn.send(("ok", result, size))
+        except Exception as e:
+            conn.send(("error", repr(e), size))
+
+# ------------------ COORDINATOR ------------------
+
+class Shard:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=shard_worker, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+        self.size = 0
+
+    def send(self, op, args=None):
+        self.conn.send((op, args))
+
+    def recv(self):
+        status, result, size = self.conn.recv()
+        self.size = size
+        if status == "error":
+            raise RuntimeError(f"Shard worker failed: {result}")
+        return result
+
+    def call(self, op, args=None):
+        self.send(op, args)
+        return self.recv()
+
+    def stop(self):
+        try:
+            self.conn.send(("stop", None))
+            self.conn.recv()
+        except (EOFError, OSError):
+            pass
+        self.proc.join()
+
+
+class ShardedStore:
+    # Shard i owns splits[i-1] <= mssv < splits[i]; the outer shards are open-ended.
+    def __init__(self, n_shards=None, max_shard_size=2_000_000, key_space=(1, 10_000_000), mp_context=None):
+        self.ctx = mp.get_context(mp_context)
+        n_shards = n_shards or mp.cpu_count()
+        self.max_shard_size = max_shard_size
+        self.shards = [Shard(self.ctx) for _ in range(n_shards)]
+        self.set_key_space(*key_space)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for shard in self.shards:
+            shard.stop()
+        self.shards = []
+
+    def __len__(self):
+        return sum(shard.size for shard in self.shards)
+
+    def set_key_space(self, lo, hi):
+        # equal-width ranges over [lo, hi]; only meaningful while the store is empty
+        n = len(self.shards)
+        step = max(1, (hi - lo) // n)
+        self.splits = [lo + step * i for i in range(1, n)]
+
+    def shard_for(self, mssv):
+        return bisect.bisect_right(self.splits, mssv)
+
+    def shards_for_range(self, lo, hi):
+        return range(self.shard_for(lo), self.shard_for(hi) + 1)
+
+    # ---------- POINT OPERATIONS ----------
+    def insert(self, mssv, name, gpa):
+        return self.write("insert", mssv, name, gpa) == INSERTED
+
+    def upsert(self, mssv, name, gpa):
+        return self.write("upsert", mssv, name, gpa)
+
+    def write(self, op, mssv, name, gpa):
+        i = self.shard_for(mssv)
+        status = self.shards[i].call(op, (mssv, name, gpa))
+        if self.shards[i].size > self.max_shard_size:
+            self.rebalance()
+        return status
+
+    def delete(self, mssv):
+        return self.shards[self.shard_for(mssv)].call("delete", mssv)
+
+    def search(self, mssv):
+        return self.shards[self.shard_for(mssv)].call("search", mssv)
+
+    # ---------- SCATTER / GATHER ----------
+    def scatter(self, indices, op, args):
+        indices = list(indices)
+        for i in indices:
+            self.shards[i].send(op, args)
+        return self.gather(indices)
+
+    def gather(self, indices):
+        # read every reply before raising: a reply left in a pipe would be
+        # taken as the answer to that shard's next call
+        results, errors = [], []
+        for i in indices:
+            try:
+                results.append(self.shards[i].recv())
+            except RuntimeError as e:
+                errors.append(f"shard {i}: {e}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return results
+
+    def range(self, lo, hi):
+        out = []
+        for part in self.scatter(self.shards_for_range(lo, hi), "range", (lo, hi)):
+            out.extend(part)
+        return out
+
+    def aggregate(self, lo=None, hi=None):
+        if lo is None or hi is None:
+            indices = range(len(self.shards))
+            lo = float("-inf") if lo is None else lo
+            hi = float("inf") if hi is None else hi
+        else:
+            indices = self.shards_for_range(lo, hi)
+        count, total, gpa_min, gpa_max = 0, 0.0, None, None
+        for c, s, mn, mx in self.scatter(indices, "aggregate", (lo, hi)):
+            if c == 0:
+                continue
+            count += c
+            total += s
+            gpa_min = mn if gpa_min is None else min(gpa_min, mn)
+            gpa_max = mx if gpa_max is None else max(gpa_max, mx)
+        return {
+            "count": count,
+            "avg_gpa": total / count if count else None,
+            "min_gpa": gpa_min,
+            "max_gpa": gpa_max,
+        }
+
+    def export(self):
+        # same row format as bulk_load, in mssv order
+        out = []
+        for part in self.scatter(range(len(self.shards)), "export", None):
+            out.extend(part)
+        return out
+
+    # ---------- BULK LOAD ----------
+    def bulk_load(self, rows, resplit=True):
+        # stable sort, then keep the first row of each mssv, same as insert()
+        rows = merge_rows([], sorted(rows, key=lambda r: r[0]))
+        if resplit and len(self) == 0 and rows:
+            # empty store: re-cut the ranges so every shard gets an equal slice
+            n = len(self.shards)
+            self.splits = [rows[len(rows) * i // n][0] for i in range(1, n)]
+        parts = [[] for _ in self.shards]
+        for row in rows:
+            parts[self.shard_for(row[0])].append(row)
+        indices = [i for i, part in enumerate(parts) if part]
+        for i in indices:
+            self.shards[i].send("load", parts[i])
+        self.gather(indices)
+        self.rebalance()
+        return len(self)
+
+    def clear(self):
+        self.scatter(range(len(self.shards)), "clear", None)
+
+    # ---------- REBALANCE ----------
+    # The number of worker processes is fixed; an overfull shard hands part of
+    # its range to the smaller neighbour. max_shard_size is a soft limit: once
+    # every shard is full they simply keep growing evenly.
+    def move_rows(self, src, dst, k):
+        end = "high" if dst > src else "low"
+        moved, boundary = self.shards[src].call("take", (k, end))
+        if not moved:
+            return
+        self.shards[dst].call("load", moved)
+        if end == "high":
+            self.splits[src] = boundary              # moved rows now start dst's range
+        else:
+            self.splits[dst] = boundary              # src's range now starts after them
+
+    def rebalance(self):
+        # each move narrows the gap between two neighbours, so this terminates;
+        # the slack keeps near-equal shards from trading a few rows per write
+        slack = max(1, self.max_shard_size // 4)
+        moved = True
+        while moved:
+            moved = False
+            for i, shard in enumerate(self.shards):
+                if shard.size <= self.max_shard_size:
+                    continue
+                neighbours = [j for j in (i - 1, i + 1) if 0 <= j < len(self.shards)]
+                if not neighbours:
+                    break
+                j = min(neighbours, key=lambda j: self.shards[j].size)
+                gap = shard.size - self.shards[j].size
+                if gap > slack:
+                    self.move_rows(i, j, gap // 2)
+                    moved = True
+
+    def shard_sizes(self):
+        return [shard.size for shard in self.shards]
+
+# ------------------ BENCHMARK (CLI) ------------------
+
+def make_rows(n, seed=0):
+    rnd = random.Random(seed)
+    return [(mssv, rnd.choice(ho_list) + " " + rnd.choice(ten_list), round(rnd.uniform(0, 10), 1))
+            for mssv in range(1, n + 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded AVL store benchmark")
+    parser.add_argument("--workers", type=int, default=mp.cpu_count())
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-shard-size", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with ShardedStore(args.workers, max_shard_size=args.max_shard_size) as store:
+        t = time.perf_counter()
+        store.bulk_load(rows)
+        print(f"bulk_load: {time.perf_counter() - t:.3f}s  shards={store.shard_sizes()}")
+
+        t = time.perf_counter()
+        stats = store.aggregate()
+        print(f"aggregate: {time.perf_counter() - t:.3f}s  {stats}")
+
+        t = time.perf_counter()
+        exported = store.export()
+        print(f"export:    {time.perf_counter() - t:.3f}s  rows={len(exported)}")
+
+if __name__ == "__main__":
+    main()
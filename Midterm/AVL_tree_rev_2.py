@@ -1,255 +1,57 @@
 import streamlit as st
-import graphviz
+import json
+import multiprocessing as mp
 import random
-import pandas as pd
+import uuid
 
-# ------------------ AVL TREE IMPLEMENTATION ------------------
-
-class StudentNode:
-    def __init__(self, mssv, name, gpa):
-        self.mssv = mssv
-        self.name = name
-        self.gpa = gpa
-        self.left = None
-        self.right = None
-        self.height = 1
-
-class AVLTree:
-    def get_height(self, node):
-        return node.height if node else 0
-
-    def get_balance(self, node):
-        return self.get_height(node.left) - self.get_height(node.right) if node else 0
-
-    # ---------- ROTATIONS ----------
-    def right_rotate(self, z):
-        y = z.left
-        T3 = y.right
-
-        y.right = z
-        z.left = T3
-
-        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
-        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
-
-        return y
-
-    def left_rotate(self, z):
-        y = z.right
-        T2 = y.left
-
-        y.left = z
-        z.right = T2
-
-        z.height = 1 + max(self.get_height(z.left), self.get_height(z.right))
-        y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
-
-        return y
-
-    # ---------- INSERT ----------
-    def insert(self, root, mssv, name, gpa):
-        if not root:
-            return StudentNode(mssv, name, gpa)
-
-        if mssv < root.mssv:
-            root.left = self.insert(root.left, mssv, name, gpa)
-        elif mssv > root.mssv:
-            root.right = self.insert(root.right, mssv, name, gpa)
-        else:
-            # duplicate IDs not allowed
-            return root
-
-        root.height = 1 + max(self.get_height(root.left), self.get_height(root.right))
-        balance = self.get_balance(root)
-
-        # 4 CASES
-        if balance > 1 and mssv < root.left.mssv:
-            return self.right_rotate(root)
-        if balance < -1 and mssv > root.right.mssv:
-            return self.left_rotate(root)
-        if balance > 1 and mssv > root.left.mssv:
-            root.left = self.left_rotate(root.left)
-            return self.right_rotate(root)
-        if balance < -1 and mssv < root.right.mssv:
-            root.right = self.right_rotate(root.right)
-            return self.left_rotate(root)
-
-        return root
-
-    # ---------- FIND MIN ----------
-    def get_min_value_node(self, root):
-        if root is None or root.left is None:
-            return root
-        return self.get_min_value_node(root.left)
-
-    # ---------- DELETE ----------
-    def delete(self, root, key):
-        if not root:
-            return root
-
-        if key < root.mssv:
-            root.left = self.delete(root.left, key)
-        elif key > root.mssv:
-            root.right = self.delete(root.right, key)
-        else:
-            # Node to be deleted found
-            if not root.left:
-                return root.right
-            elif not root.right:
-                return root.left
-
-            temp = self.get_min_value_node(root.right)
-            root.mssv = temp.mssv
-            root.name = temp.name
-            root.gpa = temp.gpa
-            root.right = self.delete(root.right, temp.mssv)
-
-        if not root:
-            return root
-
-        root.height = 1 + max(self.get_height(root.left), self.get_height(root.right))
-        balance = self.get_balance(root)
-
-        # Rebalance
-        if balance > 1 and self.get_balance(root.left) >= 0:
-            return self.right_rotate(root)
-        if balance > 1 and self.get_balance(root.left) < 0:
-            root.left = self.left_rotate(root.left)
-            return self.right_rotate(root)
-        if balance < -1 and self.get_balance(root.right) <= 0:
-            return self.left_rotate(root)
-        if balance < -1 and self.get_balance(root.right) > 0:
-            root.right = self.right_rotate(root.right)
-            return self.left_rotate(root)
-
-        return root
-
-    # ---------- SEARCH (returns node and path) ----------
-    def search_with_path(self, root, key):
-        path = []
-        node = root
-        while node:
-            path.append(node.mssv)
-            if key == node.mssv:
-                return node, path
-            elif key < node.mssv:
-                node = node.left
-            else:
-                node = node.right
-        return None, path
-
-# ------------------ UTILITIES ------------------
-
-ho_list = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Võ", "Đặng", "Bùi", "Đỗ"]
-ten_list = ["Minh", "An", "Hải", "Hưng", "Khánh", "Long", "Nam", "Phúc", "Quân", "Tuấn",
-            "Trang", "Vy", "Linh", "Nhi", "Hương", "Thảo", "Ngọc", "My", "Yến", "Hà"]
-
-def random_name():
-    return random.choice(ho_list) + " " + random.choice(ten_list)
-
-def inorder_list(node, acc):
-    if not node:
-        return
-    inorder_list(node.left, acc)
-    acc.append({"mssv": node.mssv, "name": node.name, "gpa": node.gpa})
-    inorder_list(node.right, acc)
-
-def collect_nodes(node, nodes):
-    if not node:
-        return
-    nodes.append(node)
-    collect_nodes(node.left, nodes)
-    collect_nodes(node.right, nodes)
-
-def compute_depths(root):
-    depths = {}
-    def dfs(node, d):
-        if not node:
-            return
-        depths[node.mssv] = d
-        dfs(node.left, d+1)
-        dfs(node.right, d+1)
-    dfs(root, 0)
-    return depths
+from AVL_cdc import ChangeStream
+from AVL_core import AVLTree, CONFLICT, TRUSTED, UPDATED, load_tree, random_name, tree_to_snapshot
+from AVL_generate import GPA_DISTS, PATTERNS, build_tree
+from AVL_query import Query
+from AVL_render import RenderWorker
+from AVL_view import StudentTableView
 
 # ------------------ VISUALIZATION ------------------
 
-def bf_color(bf):
-    # BF = 0: green; BF = ±1: yellow; |BF|>=2: red
-    if bf == 0:
-        return "lightgreen"
-    if abs(bf) == 1:
-        return "lightgoldenrodyellow"
-    return "lightcoral"
-
-def visualize_tree(root, highlight_path=None):
-    dot = graphviz.Digraph(format="png")
-    if not root:
-        return dot
-
-    depths = compute_depths(root)
-    nodes = []
-    collect_nodes(root, nodes)
-
-    # Create nodes with record label: {depth | mssv | BF}
-    for n in nodes:
-        bf = AVLTree().get_balance(n)
-        depth = depths.get(n.mssv, 0)
-        label = "{{ {} | {} | BF:{} }}".format(depth, n.mssv, bf)
-        style = "filled"
-        fillcolor = bf_color(bf)
-        dot.node(str(n.mssv), label=label, shape="record", style=style, fillcolor=fillcolor)
-
-    # Create edges; highlight edges along path if provided
-    def add_edges(node):
-        if not node:
+@st.cache_resource
+def get_render_worker():
+    # one render process pool shared by every session; fork where possible, since
+    # a spawned worker would re-run this script (Streamlit runs it as __main__)
+    return RenderWorker(mp_context="fork" if "fork" in mp.get_all_start_methods() else None)
+
+def show_tree(canvas, highlight_path=None):
+    # Drawing runs in the background: the rerun only queues the newest tree and
+    # shows the last finished image; a fragment polls until the new one is ready.
+    worker = get_render_worker()
+    key = (st.session_state.session_id, canvas)
+    token = (st.session_state.tree_obj.version, tuple(highlight_path or ()))
+    worker.request(key, token, st.session_state.root, highlight_path)
+    polling = worker.is_pending(key)
+
+    @st.fragment(run_every=0.5 if polling else None, key=f"tree_{canvas}")
+    def draw():
+        if polling and not worker.is_pending(key):
+            # render finished (or failed): run_every is fixed when the fragment
+            # is declared, so rerun the whole app to declare it without polling
+            st.rerun()
+        latest = worker.latest(key)
+        if latest is None:
+            if worker.error(key):
+                st.error(f"Không vẽ được cây: {worker.error(key)}")
+            else:
+                st.info("⏳ Đang vẽ cây…")
             return
-        if node.left:
-            attrs = {}
-            if highlight_path and (node.mssv in highlight_path and node.left.mssv in highlight_path):
-                try:
-                    i = highlight_path.index(node.mssv)
-                    if (i+1 < len(highlight_path) and highlight_path[i+1] == node.left.mssv) or (i>0 and highlight_path[i-1] == node.left.mssv):
-                        attrs = {"color":"red", "penwidth":"2"}
-                except (ValueError, IndexError):
-                    attrs = {}
-            dot.edge(str(node.mssv), str(node.left.mssv), **attrs)
-            add_edges(node.left)
-        if node.right:
-            attrs = {}
-            if highlight_path and (node.mssv in highlight_path and node.right.mssv in highlight_path):
-                try:
-                    i = highlight_path.index(node.mssv)
-                    if (i+1 < len(highlight_path) and highlight_path[i+1] == node.right.mssv) or (i>0 and highlight_path[i-1] == node.right.mssv):
-                        attrs = {"color":"red", "penwidth":"2"}
-                except (ValueError, IndexError):
-                    attrs = {}
-            dot.edge(str(node.mssv), str(node.right.mssv), **attrs)
-            add_edges(node.right)
-    add_edges(root)
-    return dot
-
-# ------------------ SAVE / LOAD TREE ------------------
-
-def tree_to_dict(node):
-    if not node:
-        return None
-    return {
-        "mssv": node.mssv,
-        "name": node.name,
-        "gpa": node.gpa,
-        "left": tree_to_dict(node.left),
-        "right": tree_to_dict(node.right)
-    }
-
-def dict_to_tree(data):
-    if data is None:
-        return None
-    node = StudentNode(data["mssv"], data["name"], data["gpa"])
-    node.left = dict_to_tree(data.get("left"))
-    node.right = dict_to_tree(data.get("right"))
-    # height will be recalculated when rebuilding via insert for balance
-    return node
+        shown, kind, data = latest
+        if kind == "svg":
+            st.image(data)
+        else:
+            # không có Graphviz trên máy chủ -> trình duyệt tự vẽ từ DOT
+            st.graphviz_chart(data)
+        if worker.error(key):
+            st.warning(f"Không vẽ được cây mới nhất: {worker.error(key)}")
+        elif shown != token:
+            st.caption("⏳ Đang vẽ lại cây… (đang hiển thị bản trước)")
+    draw()
 
 # ------------------ STREAMLIT UI ------------------
 
@@ -262,11 +64,20 @@ if "tree_obj" not in st.session_state:
     st.session_state.root = None
     st.session_state.next_id = 1
 
+if "view" not in st.session_state:
+    # the table view follows the tree through its change stream
+    st.session_state.view = StudentTableView()
+    st.session_state.tree_obj.changes = ChangeStream()
+    st.session_state.tree_obj.changes.subscribe(st.session_state.view.apply)
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 # Layout: tabs
 # tabs = st.tabs(["➕ Thêm", "❌ Xóa", "✏️ Cập nhật", "🔍 Tìm kiếm", "🌳 Xem cây", "💾 Lưu/Đọc & Xuất"])
 # tab_add, tab_delete, tab_update, tab_search, tab_view, tab_save = tabs
-tabs = st.tabs(["➕ Thêm", "❌ Xóa", "✏️ Cập nhật", "🔍 Tìm kiếm", "🌳 Xem cây"])
-tab_add, tab_delete, tab_update, tab_search, tab_view = tabs
+tabs = st.tabs(["➕ Thêm", "❌ Xóa", "✏️ Cập nhật", "🔍 Tìm kiếm", "🌳 Xem cây", "💾 Lưu/Đọc"])
+tab_add, tab_delete, tab_update, tab_search, tab_view, tab_save = tabs
 
 # ---------------- TAB: ADD ----------------
 with tab_add:
@@ -294,6 +105,24 @@ with tab_add:
         st.session_state.next_id += 1
         st.success(f"Đã thêm ngẫu nhiên MSSV = {mssv} — {name} — GPA: {gpa}")
 
+    with st.expander("🧪 Sinh dữ liệu lớn (kiểm thử tải)"):
+        gen_rows = st.number_input("Số sinh viên:", min_value=1, max_value=10_000_000, step=1000, value=10_000, key="gen_rows")
+        gen_pattern = st.selectbox("Kiểu MSSV:", PATTERNS, key="gen_pattern")
+        gen_gpa = st.selectbox("Phân phối GPA:", GPA_DISTS, key="gen_gpa")
+        gen_seed = st.number_input("Seed:", min_value=0, step=1, value=0, key="gen_seed")
+        if st.button("Sinh dữ liệu"):
+            tree = st.session_state.tree_obj
+            try:
+                st.session_state.root = build_tree(tree, st.session_state.root, int(gen_rows),
+                                                   seed=int(gen_seed), start=st.session_state.next_id,
+                                                   pattern=gen_pattern, gpa_dist=gen_gpa)
+            except ValueError as e:
+                st.error(f"Không sinh được dữ liệu: {e}")
+            else:
+                st.session_state.view.rebuild(st.session_state.root, tree.version)
+                st.session_state.next_id = int(st.session_state.view.mssv[len(st.session_state.view) - 1]) + 1
+                st.success(f"Đã sinh {int(gen_rows):,} sinh viên.")
+
 # ---------------- TAB: DELETE ----------------
 with tab_delete:
     st.header("❌ Xóa sinh viên")
@@ -312,6 +141,8 @@ with tab_delete:
         if st.button("🧹 Xóa toàn bộ"):
             st.session_state.root = None
             st.session_state.next_id = 1
+            st.session_state.tree_obj.version += 1
+            st.session_state.tree_obj.emit("reset", None)
             st.success("Đã xóa toàn bộ sinh viên (cây rỗng).")
 
 # ---------------- TAB: UPDATE ----------------
@@ -321,7 +152,7 @@ with tab_update:
     if st.button("Tìm để cập nhật"):
         node, path = st.session_state.tree_obj.search_with_path(st.session_state.root, up_id)
         if node:
-            st.session_state._edit_node = {"mssv": node.mssv, "name": node.name, "gpa": node.gpa}
+            st.session_state._edit_node = {"mssv": node.mssv, "name": node.name, "gpa": node.gpa, "version": node.version}
             st.success("Tìm thấy sinh viên — bạn có thể chỉnh sửa thông tin bên dưới.")
         else:
             st.error("Không tìm thấy MSSV để cập nhật.")
@@ -332,14 +163,18 @@ with tab_update:
         new_gpa = st.number_input("Điểm trung bình (0–10, 1 chữ số):", min_value=0.0, max_value=10.0, step=0.1,
                                   value=float(edit["gpa"]), key="edit_gpa", format="%.1f")
         if st.button("Cập nhật"):
-            # find node, update fields
-            node, _ = st.session_state.tree_obj.search_with_path(st.session_state.root, edit["mssv"])
-            if node:
-                node.name = new_name.strip() if new_name.strip()!="" else node.name
-                node.gpa = round(float(new_gpa), 1)
+            # one descent: only applied if nobody changed the student since "Tìm"
+            fields = {"gpa": round(float(new_gpa), 1)}
+            if new_name.strip() != "":
+                fields["name"] = new_name.strip()
+            st.session_state.root, node, status = st.session_state.tree_obj.update_if(
+                st.session_state.root, edit["mssv"], edit["version"], **fields)
+            if status == UPDATED:
                 st.success(f"Đã cập nhật MSSV = {node.mssv}")
                 # clear edit state
                 del st.session_state["_edit_node"]
+            elif status == CONFLICT:
+                st.error("Sinh viên đã bị thay đổi sau khi tìm — vui lòng tìm lại trước khi cập nhật.")
             else:
                 st.error("Lỗi: không tìm thấy node khi cập nhật.")
 
@@ -348,39 +183,94 @@ with tab_search:
     st.header("🔍 Tìm kiếm sinh viên")
     s_id = st.number_input("Nhập MSSV:", min_value=1, step=1, value=1, key="search_id")
     if st.button("Tìm"):
-        node, path = st.session_state.tree_obj.search_with_path(st.session_state.root, s_id)
+        # kept across reruns so the highlighted tree stays on screen while it is drawn
+        st.session_state.search_key = s_id
+    if "search_key" in st.session_state:
+        node, path = st.session_state.tree_obj.search_with_path(st.session_state.root, st.session_state.search_key)
         if node:
             st.success(f"✔ Tìm thấy: MSSV={node.mssv} — Tên: {node.name} — GPA: {node.gpa}")
             st.write("Đường đi (MSSV visited):", " → ".join(map(str, path)))
             # visualize with highlighted path
-            dot = visualize_tree(st.session_state.root, highlight_path=path)
-            st.graphviz_chart(dot)
+            show_tree("search", highlight_path=path)
         else:
             st.error("Không tìm thấy sinh viên!")
             # visualize tree without highlight
-            dot = visualize_tree(st.session_state.root)
-            st.graphviz_chart(dot)
+            show_tree("search")
+
+    st.markdown("### 🔎 Lọc nâng cao")
+    q_expr = st.text_input("Điều kiện (vd. gpa >= 8 and name contains 'Linh' and mssv between 1000 and 5000):", key="query_expr")
+    q_limit = st.number_input("Số dòng tối đa:", min_value=1, step=1, value=100, key="query_limit")
+    if st.button("Lọc"):
+        view = st.session_state.view
+        if not view.is_current(st.session_state.tree_obj):
+            view.rebuild(st.session_state.root, st.session_state.tree_obj.version)
+        try:
+            q = Query(st.session_state.tree_obj, st.session_state.root, view).limit(int(q_limit))
+            if q_expr.strip():
+                q.where(q_expr)
+            rows = q.all()
+        except ValueError as e:
+            st.error(f"Điều kiện không hợp lệ: {e}")
+        else:
+            st.code(q.explain())
+            st.write(f"{len(rows)} sinh viên")
+            st.dataframe(rows)
+
+# ---------------- TAB: SAVE / LOAD ----------------
+# (chạy trước tab "Xem cây" để bảng hiển thị ngay cây vừa đọc)
+with tab_save:
+    st.header("💾 Lưu / Đọc cây AVL")
+    if st.button("💾 Lưu cây"):
+        if st.session_state.root:
+            # json.dumps in one go: much faster than json.dump on a large tree
+            with open("tree_data.json", "w", encoding="utf-8") as f:
+                f.write(json.dumps(tree_to_snapshot(st.session_state.root), ensure_ascii=False))
+            st.success("Đã lưu cây vào file tree_data.json")
+        else:
+            st.error("Cây rỗng, không thể lưu.")
+
+    if st.button("📂 Đọc cây"):
+        try:
+            with open("tree_data.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # O(n): dùng nguyên cây nếu hợp lệ, nếu không thì dựng lại cây cân bằng
+            root, status = load_tree(data, st.session_state.tree_obj)
+        except (OSError, ValueError, KeyError, TypeError):
+            st.error("Không tìm thấy file hoặc file lỗi.")
+        else:
+            st.session_state.root = root
+            node = root
+            while node and node.right:
+                node = node.right
+            st.session_state.next_id = node.mssv + 1 if node else 1
+            if status == TRUSTED:
+                st.success("Đã đọc cây — cấu trúc AVL hợp lệ, dùng nguyên trạng.")
+            else:
+                st.success("Đã đọc cây — cấu trúc không hợp lệ nên đã dựng lại cây cân bằng.")
 
 # ---------------- TAB: VIEW TREE ----------------
 with tab_view:
     st.header("🌳 Xem cây AVL hiện tại")
     # Show tree
-    dot = visualize_tree(st.session_state.root)
-    st.graphviz_chart(dot)
+    show_tree("view")
 
     st.markdown("### 📋 Danh sách sinh viên (bảng - theo MSSV)")
-    students = []
-    inorder_list(st.session_state.root, students)
-    if students:
-        df = pd.DataFrame(students).sort_values("mssv").reset_index(drop=True)
-        st.dataframe(df)
-        csv = df.to_csv(index=False).encode('utf-8')
+    view = st.session_state.view
+    if not view.is_current(st.session_state.tree_obj):
+        # bảng lệch phiên bản với cây (vd. phiên cũ) -> dựng lại một lần
+        view.rebuild(st.session_state.root, st.session_state.tree_obj.version)
+    if len(view):
+        page_size = 50
+        n_pages = (len(view) - 1) // page_size + 1
+        page = st.number_input(f"Trang (1–{n_pages}):", min_value=1, max_value=n_pages, step=1, value=1, key="table_page")
+        # chỉ dựng DataFrame cho trang đang hiển thị
+        st.dataframe(view.page((page - 1) * page_size, page_size))
         st.download_button(
                             label="📥 Tải CSV danh sách sinh viên",
-                            data=csv,
+                            data=view.to_csv,   # chỉ tạo CSV khi người dùng bấm tải
                             file_name="danh_sach_sinh_vien.csv",
                             mime="text/csv",
-                            key=f"download_csv_{len(df)}"   # khóa thay đổi mỗi lần render
+                            key=f"download_csv_{view.version}"   # khóa thay đổi mỗi lần render
                         )
     else:
         st.info("Không có sinh viên để hiển thị.")
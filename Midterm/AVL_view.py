@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+# Columnar, MSSV-ordered copy of the student list for the UI table.
+# insert/delete/update patch the arrays in place (one searchsorted + one
+# memmove) instead of rebuilding inorder_list -> DataFrame -> sort on every
+# rerun. `version` records which AVLTree.version the arrays reflect.
+
+class StudentTableView:
+    def __init__(self, capacity=1024):
+        self.mssv = np.empty(capacity, dtype=np.int64)
+        self.gpa = np.empty(capacity, dtype=np.float64)
+        self.name = np.empty(capacity, dtype=object)
+        self.size = 0
+        self.version = 0
+        self._csv = None
+        self._gpa_index = None
+
+    def __len__(self):
+        return self.size
+
+    def is_current(self, tree):
+        return self.version == tree.version
+
+    # ---------- FULL (RE)BUILD ----------
+    def rebuild(self, root, version):
+        mssv, name, gpa = [], [], []
+        stack, node = [], root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            mssv.append(node.mssv)
+            name.append(node.name)
+            gpa.append(node.gpa)
+            node = node.right
+        n = len(mssv)
+        self.reserve(n, copy=False)
+        self.mssv[:n] = mssv
+        self.gpa[:n] = gpa
+        self.name[:n] = name
+        self.size = n
+        self.touch(version)
+
+    def clear(self, version):
+        self.size = 0
+        self.touch(version)
+
+    # ---------- INCREMENTAL PATCHES ----------
+    def insert(self, mssv, name, gpa, version):
+        i = self.find(mssv)
+        # duplicate MSSV: AVLTree.insert keeps the existing student, so do we
+        if not (i < self.size and self.mssv[i] == mssv):
+            self.reserve(self.size + 1)
+            n = self.size
+            for col in (self.mssv, self.gpa, self.name):
+                col[i + 1:n + 1] = col[i:n]
+            self.mssv[i], self.name[i], self.gpa[i] = mssv, name, gpa
+            self.size += 1
+        self.touch(version)
+
+    def delete(self, mssv, version):
+        i = self.find(mssv)
+        if i < self.size and self.mssv[i] == mssv:
+            n = self.size
+            for col in (self.mssv, self.gpa, self.name):
+                col[i:n - 1] = col[i + 1:n]
+            self.name[n - 1] = None
+            self.size -= 1
+        self.touch(version)
+
+    def update(self, mssv, name, gpa, version):
+        i = self.find(mssv)
+        if i < self.size and self.mssv[i] == mssv:
+            self.name[i], self.gpa[i] = name, gpa
+        self.touch(version)
+
+    def apply(self, event):
+        # AVL_cdc subscriber: keeps the view in step with the tree's writes
+        if event.op == "insert":
+            self.insert(event.mssv, event.after["name"], event.after["gpa"], event.version)
+        elif event.op == "delete":
+            self.delete(event.mssv, event.version)
+        elif event.op == "update":
+            self.update(event.mssv, event.after["name"], event.after["gpa"], event.version)
+        else:
+            # "reset": tree replaced wholesale, rebuild on next is_current() check
+            self.touch(-1)
+
+    # ---------- READ ----------
+    def page(self, offset, limit):
+        lo = max(0, min(offset, self.size))
+        hi = min(self.size, lo + limit)
+        return pd.DataFrame({
+            "mssv": self.mssv[lo:hi],
+            "name": self.name[lo:hi],
+            "gpa": self.gpa[lo:hi],
+        }, index=pd.RangeIndex(lo, hi))
+
+    def to_csv(self):
+        # cached per version; the UI passes this method itself as the download
+        # data, so the O(n) build only runs when someone clicks download
+        if self._csv is None:
+            self._csv = self.page(0, self.size).to_csv(index=False).encode("utf-8")
+        return self._csv
+
+    def gpa_index(self):
+        # secondary index for AVL_query: (gpa sorted, positions in that order)
+        if self._gpa_index is None:
+            order = np.argsort(self.gpa[:self.size], kind="stable")
+            self._gpa_index = (self.gpa[:self.size][order], order)
+        return self._gpa_index
+
+    # ---------- INTERNALS ----------
+    def find(self, mssv):
+        return int(np.searchsorted(self.mssv[:self.size], mssv))
+
+    def reserve(self, n, copy=True):
+        cap = len(self.mssv)
+        if n <= cap:
+            return
+        cap = max(cap, 1)
+        while cap < n:
+            cap *= 2
+        for attr in ("mssv", "gpa", "name"):
+            old = getattr(self, attr)
+            new = np.empty(cap, dtype=old.dtype)
+            if copy:
+                new[:self.size] = old[:self.size]
+            setattr(self, attr, new)
+
+    def touch(self, version):
+        self.version = version
+        self._csv = None
+        self._gpa_index = None